@@ -1,460 +1,356 @@
-import io
-import unicodedata
-from pathlib import Path
-from glob import iglob
-import pandas as pd
-import streamlit as st
-
-# ================== CONFIG & ESTILOS ==================
-st.set_page_config(page_title="ARTIKA BOOKS - GUIAS", page_icon="📚", layout="wide")
-
-PRIMARY_COLOR = "#000722"
-BG_IMAGE = "https://artikabooks.com/wp-content/uploads/2025/02/Banner_Artika_ok-scaled.jpg"
-LOGO_URL = "https://artikabooks.com/wp-content/uploads/2024/01/logo-artikabooks.svg"
-
-st.markdown(
-    f"""
-    <style>
-        div[data-testid="stDecoration"] {{ display:none !important; }}
-        header[data-testid="stHeader"] {{ background:transparent !important; box-shadow:none !important; border-bottom:none !important; }}
-        html, body, [data-testid="stAppViewContainer"] {{ margin:0 !important; padding:0 !important; }}
-        .stApp {{
-            background: linear-gradient(rgba(255,255,255,0.5), rgba(255,255,255,0.5)),
-                        url("{BG_IMAGE}");
-            background-size: cover; background-position:center; color:{PRIMARY_COLOR};
-        }}
-        .header-container {{ display:flex; align-items:center; justify-content:flex-start; background:white; padding:16px 26px; border-radius:12px; margin-bottom:16px; border:1px solid rgba(0,0,0,0.06); }}
-        .header-logo {{height:54px; margin-right:18px;}}
-        .header-title {{font-size:28px; font-weight:800; color:{PRIMARY_COLOR};}}
-        h1,h2,h3,h4,h5,h6,p,label,span,div {{ color:{PRIMARY_COLOR} !important; }}
-        .stSelectbox div[data-baseweb="select"] > div {{ background:white !important; color:{PRIMARY_COLOR} !important; border:1px solid {PRIMARY_COLOR} !important; border-radius:6px !important; }}
-        .stSelectbox div[data-baseweb="select"] svg {{ fill:{PRIMARY_COLOR} !important; }}
-        div[data-baseweb="popover"], div[role="listbox"], div[role="option"] {{ background:white !important; color:{PRIMARY_COLOR} !important; }}
-        div[role="listbox"] {{ border:1px solid {PRIMARY_COLOR} !important; border-radius:8px !important; }}
-        div[role="option"]:hover {{ background:#e6eaf5 !important; }}
-        .stFileUploader [data-testid="stFileUploaderDropzone"] {{ background:white !important; border:2px dashed {PRIMARY_COLOR} !important; border-radius:10px !important; }}
-        .stTextInput input, .stNumberInput input[type="number"] {{ background:white !important; color:{PRIMARY_COLOR} !important; border:1px solid {PRIMARY_COLOR} !important; border-radius:6px !important; }}
-        .stDownloadButton button {{ background:white !important; color:{PRIMARY_COLOR} !important; border:1px solid {PRIMARY_COLOR} !important; border-radius:6px !important; font-weight:600 !important; padding:6px 16px !important; }}
-        .stDownloadButton button:hover {{ background:#e6eaf5 !important; }}
-        section[data-testid="stSidebar"] > div {{ background:rgba(255,255,255,0.92); padding:8px 10px; border-left:1px solid rgba(0,0,0,0.06); }}
-        section[data-testid="stSidebar"] * {{ color:{PRIMARY_COLOR} !important; }}
-        div[data-testid="stDataFrame"] {{ background:rgba(255,255,255,0.85); border-radius:10px; padding:6px; }}
-    </style>
-    """,
-    unsafe_allow_html=True
-)
-
-# Cabecera
-st.markdown(
-    f"""
-    <div class="header-container">
-        <img src="{LOGO_URL}" class="header-logo">
-        <div class="header-title">    CAPTACIÓN - GUIAS</div>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
-
-st.caption("Carga un CSV, aplica el pipeline de transformación y descarga el resultado en Excel (.xlsx).")
-
-# ================== SIDEBAR ==================
-with st.sidebar:
-    st.header("⚙️ Opciones de lectura (CSV principal)")
-    sep_in = st.selectbox("Separador de entrada", [",", ";", "\t"], index=0)
-    enc_in = st.selectbox("Codificación de entrada", ["utf-8", "latin-1"], index=0)
-    st.header("🧩 Maestro de modalidad")
-    url_modalidad = st.text_input("URL RAW de GitHub (opcional)", placeholder="https://raw.githubusercontent.com/.../modalidad.xlsx")
-    debug_mode = st.checkbox("🔧 Modo diagnóstico", value=False, help="Muestra rutas y archivos reales en el entorno")
-
-uploaded = st.file_uploader("📤 Sube tu archivo CSV", type=["csv"])
-
-# ================== PARÁMETROS DEL PIPELINE ==================
-COLUMNAS_NECESARIAS = [
-    "Submission ID", "Created", "Nombre y Apellidos",
-    "Teléfono", "Email", "Guía", "Artista",
-    "gdpr_e", "gdpr_g", "campaign_fullcode", "País"
-]
-
-RENOMBRE = {
-    "Submission ID": "id_integrador",
-    "Created": "fecha_captacion",
-    "Nombre y Apellidos": "nombre",
-    "Teléfono": "telefono",
-    "Email": "email",
-    "Guía": "guia",
-    "Artista": "producto_interes",
-    "gdpr_e": "rgpd_acepta",
-    "gdpr_g": "rgpd_grupo",
-    "campaign_fullcode": "modalidad",
-    "País": "pais"
-}
-
-MAP_RGPD = {"No": "No", "Yes": "Sí"}
-MAP_PRODUCTO = {
-    "PS":  "Antonio López - Paisajes",
-    "DC":  "Manolo Valdés - Damas y Caballeros",
-    "SI":  "Sorolla Íntimo",
-    "P61": "Jaume Plensa 61",
-    "VC":  "Fernando Botero - Via Crucis",
-    "CV":  "Steve McCurry - Capturando la vida",
-}
-
-# ================== UTILIDADES ==================
-def normalizar_texto_series(s: pd.Series) -> pd.Series:
-    s = s.astype(str).str.strip().str.lower()
-    s = s.apply(lambda x: ''.join(c for c in unicodedata.normalize('NFKD', x) if not unicodedata.combining(c)))
-    s = s.str.replace(r'[^0-9a-z]+', ' ', regex=True)
-    s = s.str.replace(r'\s+', ' ', regex=True).str.strip()
-    return s
-
-@st.cache_data(show_spinner=False)
-def listar_archivos(d: Path) -> list[str]:
-    try:
-        return sorted([p.name for p in d.iterdir() if p.is_file()])
-    except Exception:
-        return []
-
-@st.cache_data(show_spinner=False)
-def cargar_excel_local(paths: list[Path]) -> tuple[pd.DataFrame | None, str, list[str], str, str]:
-    """
-    Intenta cargar el primer Excel que exista en 'paths'.
-    Devuelve: (df, origen, rutas_probadas, appdir, cwd)
-    """
-    probadas = []
-    for p in paths:
-        probadas.append(str(p))
-        try:
-            if p.exists():
-                df = pd.read_excel(p)
-                return df, str(p), probadas, str(Path(__file__).parent), str(Path.cwd())
-        except Exception:
-            continue
-    return None, "", probadas, str(Path(__file__).parent), str(Path.cwd())
-
-@st.cache_data(show_spinner=False)
-def cargar_excel_url(url: str) -> tuple[pd.DataFrame | None, str]:
-    try:
-        df = pd.read_excel(url)
-        return df, url
-    except Exception:
-        return None, url
-
-def buscar_candidatos_modalidad() -> list[Path]:
-    """
-    Busca modalidad ignorando mayúsculas y por coincidencia parcial 'modalid'
-    en: appdir, ./data, cwd, /mnt/data
-    """
-    appdir = Path(__file__).parent
-    datadir = appdir / "data"
-    cwd = Path.cwd()
-    bases = [appdir, datadir, cwd, Path("/mnt/data")]
-
-    def case_insensitive(base: Path, fname: str) -> list[Path]:
-        if not base.exists():
-            return []
-        target = fname.lower()
-        return [p for p in base.iterdir() if p.is_file() and p.name.lower() == target]
-
-    candidates: list[Path] = []
-    for b in bases:
-        candidates += case_insensitive(b, "modalidad.xlsx")
-        candidates += case_insensitive(b, "Modalidad.xlsx")
-
-    # Coincidencia parcial *.xls* que contenga 'modalid'
-    for b in [appdir, datadir]:
-        if b.exists():
-            for p in iglob(str(b / "**/*.xls*"), recursive=True):
-                pth = Path(p)
-                if "modalid" in pth.name.lower():
-                    candidates.append(pth)
-
-    # Quitar duplicados manteniendo orden
-    seen = set()
-    unique = []
-    for p in candidates:
-        rp = str(p.resolve())
-        if rp not in seen:
-            seen.add(rp)
-            unique.append(p)
-    return unique
-
-# ========== CARGA MAESTRO PAÍSES ==========
-@st.cache_data(show_spinner=False)
-def cargar_maestro_paises() -> tuple[pd.DataFrame | None, str, list[str], str, str]:
-    paths = [
-        Path(__file__).parent / "Paises_landing_ISO.xlsx",
-        Path(__file__).parent / "data" / "Paises_landing_ISO.xlsx",
-        Path.cwd() / "Paises_landing_ISO.xlsx",
-        Path.cwd() / "data" / "Paises_landing_ISO.xlsx",
-        Path("/mnt/data/Paises_landing_ISO.xlsx"),
-    ]
-    return cargar_excel_local(paths)
-
-DF_MAESTRO_PAISES, ORIGEN_PAISES, RUTAS_PAISES, APPDIR, CWD = cargar_maestro_paises()
-if DF_MAESTRO_PAISES is not None and {"País","País_normalizado"}.issubset(DF_MAESTRO_PAISES.columns):
-    st.caption(f"✅ Maestro de países cargado desde: {ORIGEN_PAISES}")
-    st.dataframe(DF_MAESTRO_PAISES.head(10), use_container_width=True)
-else:
-    st.error("❌ No se encontró/valida el maestro de países 'Paises_landing_ISO.xlsx' (faltan columnas 'País' y 'País_normalizado').")
-    with st.expander("Rutas probadas (países)"):
-        st.code("\n".join(RUTAS_PAISES))
-
-# ========== CARGA MAESTRO MODALIDAD (usa columnas EXACTAS: 'modalidad' y 'nombre') ==========
-def _normaliza_headers_y_renombra_a_min(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Normaliza encabezados y, si detecta equivalentes, los renombra a 'modalidad' y 'nombre'.
-    Acepta variantes como 'Modalidad', 'NOMBRE', 'Nombre de modalidad', etc.
-    """
-    def norm(s: str) -> str:
-        s = str(s).strip().lower()
-        s = ''.join(c for c in unicodedata.normalize('NFKD', s) if not unicodedata.combining(c))
-        s = ''.join(ch if ch.isalnum() else ' ' for ch in s)
-        s = ' '.join(s.split())
-        return s
-
-    mapping = {}
-    for c in df.columns:
-        nc = norm(c)
-        if nc == "modalidad":
-            mapping[c] = "modalidad"
-        elif nc in ("nombre", "nombre modalidad", "modalidad nombre", "nombre de modalidad"):
-            mapping[c] = "nombre"
-    if mapping:
-        df = df.rename(columns=mapping)
-    return df
-
-def cargar_maestro_modalidad(url_hint: str | None = None):
-    # 1) Si nos dan URL RAW, priorizamos
-    if url_hint:
-        df_url, origen_url = cargar_excel_url(url_hint)
-        if df_url is not None:
-            df_url = _normaliza_headers_y_renombra_a_min(df_url)
-            return df_url, origen_url, ["(usada URL proporcionada)"], APPDIR, CWD
-
-    # 2) Búsqueda local flexible
-    candidates = buscar_candidatos_modalidad()
-    if not candidates:
-        candidates = [
-            Path(__file__).parent / "modalidad.xlsx",
-            Path(__file__).parent / "data" / "modalidad.xlsx",
-            Path.cwd() / "modalidad.xlsx",
-            Path.cwd() / "data" / "modalidad.xlsx",
-            Path("/mnt/data/modalidad.xlsx"),
-        ]
-    df, origen, rutas, appdir, cwd = cargar_excel_local(candidates)
-    if df is not None:
-        df = _normaliza_headers_y_renombra_a_min(df)
-    return df, origen, rutas, appdir, cwd
-
-DF_MAESTRO_MODALIDAD, ORIGEN_MODALIDAD, RUTAS_MODALIDAD, APPDIR, CWD = cargar_maestro_modalidad(url_modalidad if url_modalidad.strip() else None)
-if DF_MAESTRO_MODALIDAD is None:
-    st.error("❌ No se encontró el maestro 'modalidad.xlsx'.")
-    with st.expander("Rutas/criterios probados (modalidad)"):
-        st.code("\n".join(RUTAS_MODALIDAD))
-else:
-    # 👉 Validamos EXACTAMENTE estas columnas: 'modalidad' y 'nombre'
-    cols_ok = {"modalidad","nombre"}.issubset(DF_MAESTRO_MODALIDAD.columns)
-    if not cols_ok:
-        st.warning(
-            f"⚠️ Maestro de modalidad cargado desde {ORIGEN_MODALIDAD}, "
-            f"pero faltan columnas 'modalidad' y/o 'nombre'. Columnas detectadas: {list(DF_MAESTRO_MODALIDAD.columns)}"
-        )
-    else:
-        # Trims básicos
-        DF_MAESTRO_MODALIDAD["modalidad"] = DF_MAESTRO_MODALIDAD["modalidad"].astype(str).str.strip()
-        DF_MAESTRO_MODALIDAD["nombre"]    = DF_MAESTRO_MODALIDAD["nombre"].astype(str).str.strip()
-        st.success(f"✅ Maestro de modalidad cargado correctamente desde: {ORIGEN_MODALIDAD} ({len(DF_MAESTRO_MODALIDAD)} filas)")
-    st.dataframe(DF_MAESTRO_MODALIDAD.head(10), use_container_width=True)
-
-# ========= PANEL DIAGNÓSTICO OPCIONAL =========
-if debug_mode:
-    st.subheader("🔧 Diagnóstico del entorno")
-    col1, col2 = st.columns(2)
-    with col1:
-        st.write("`__file__`:", __file__)
-        st.write("`APPDIR`:", APPDIR)
-        st.write("`CWD`:", CWD)
-    with col2:
-        st.write("Archivos en APPDIR:")
-        st.code("\n".join(listar_archivos(Path(APPDIR))) or "(no se pudieron listar)")
-        st.write("Archivos en ./data:")
-        st.code("\n".join(listar_archivos(Path(APPDIR) / "data")) or "(no se pudieron listar)")
-
-# ================== FUNCIÓN DE TRANSFORMACIÓN ==================
-def transformar(df: pd.DataFrame, start_id_value=None,
-                df_paises: pd.DataFrame | None = None,
-                df_modalidad: pd.DataFrame | None = None) -> pd.DataFrame:
-
-    faltan = [c for c in COLUMNAS_NECESARIAS if c not in df.columns]
-    if faltan:
-        st.warning(f"Faltan columnas en la entrada: {faltan}")
-    presentes = [c for c in COLUMNAS_NECESARIAS if c in df.columns]
-    df = df[presentes].copy()
-
-    df.rename(columns=RENOMBRE, inplace=True)
-
-    if start_id_value is not None and "id_integrador" in df.columns:
-        df["id_integrador"] = pd.to_numeric(df["id_integrador"], errors="coerce")
-        total_antes = len(df)
-        df = df.dropna(subset=["id_integrador"])
-        descartados_no_num = total_antes - len(df)
-        df = df.loc[df["id_integrador"] >= int(start_id_value)]
-        descartados_previos = total_antes - descartados_no_num - len(df)
-        st.info(f"Filtrado por ID desde **{int(start_id_value)}**: no numéricos = {descartados_no_num}, anteriores = {max(descartados_previos, 0)}")
-
-    if "producto_interes" in df.columns:
-        df = df[~df["producto_interes"].astype(str).str.contains("NON", case=False, na=False)]
-
-    df["telefono_norm"] = df["telefono"].astype(str).str.replace(" ", "", regex=False) if "telefono" in df.columns else ""
-    df["email_norm"] = df["email"].astype(str).str.strip().str.lower() if "email" in df.columns else ""
-    df = df.drop_duplicates(subset=["telefono_norm"], keep="first")
-    df = df.drop_duplicates(subset=["email_norm"], keep="first")
-    df.drop(columns=["telefono_norm", "email_norm"], inplace=True, errors="ignore")
-
-    # Nombre completo → nombre_pila + primer_apellido
-    if "nombre" in df.columns:  # (este es el nombre de la persona tras RENOMBRE)
-        df["nombre_pila"] = df["nombre"].astype(str).str.split().str[0]
-        df["primer_apellido"] = df["nombre"].astype(str).str.split(n=1).str[1].fillna("")
-        df.drop(columns=["nombre"], inplace=True)  # liberamos el nombre personal para evitar colisión con 'nombre' de modalidad
-
-    if "id_integrador" in df.columns:
-        df["id_integrador"] = df["id_integrador"].astype("Int64").astype(str) + "-es_guias"
-
-    if "telefono" in df.columns:
-        df["telefono"] = df["telefono"].astype(str).str.replace(" ", "", regex=False)
-
-    if "pais" in df.columns:
-        df["pais"] = df["pais"].astype(str).str.split(":").str[0].str.strip()
-
-    # --- Cruce PAÍSES ---
-    if df_paises is not None and {"País","País_normalizado"}.issubset(df_paises.columns) and "pais" in df.columns:
-        df["_pais_norm"] = normalizar_texto_series(df["pais"])
-        mp = df_paises.copy()
-        mp["_pais_norm"] = normalizar_texto_series(mp["País"])
-        mp = mp.drop_duplicates(subset=["_pais_norm"], keep="first")
-        df = df.merge(mp[["_pais_norm", "País_normalizado"]], on="_pais_norm", how="left")
-        df["pais"] = df["País_normalizado"].fillna(df["pais"])
-        total = len(df); matched = df["País_normalizado"].notna().sum()
-        if total > 0: st.info(f"Maestro de países: {matched} de {total} filas normalizadas ({matched/total:.1%}).")
-        no_match = df.loc[df["País_normalizado"].isna(), "_pais_norm"].dropna().unique().tolist()
-        if no_match:
-            st.warning("Países sin correspondencia (muestra máx. 20): " + ", ".join(no_match[:20]) + ("..." if len(no_match) > 20 else ""))
-        df.drop(columns=["_pais_norm", "País_normalizado"], inplace=True, errors="ignore")
-
-    # Map RGPD
-    if "rgpd_acepta" in df.columns: df["rgpd_acepta"] = df["rgpd_acepta"].map(MAP_RGPD)
-    if "rgpd_grupo"  in df.columns: df["rgpd_grupo"]  = df["rgpd_grupo"].map(MAP_RGPD)
-
-    # Map producto_interes
-    if "producto_interes" in df.columns:
-        df["producto_interes"] = df["producto_interes"].astype(str).str.strip().map(MAP_PRODUCTO).fillna(df["producto_interes"])
-
-    # --- Cruce MODALIDAD (usa EXACTAMENTE columnas 'modalidad' y 'nombre' del maestro) ---
-    if df_modalidad is not None and {"modalidad","nombre"}.issubset(df_modalidad.columns) and "modalidad" in df.columns:
-        dm = df_modalidad.copy()
-        df["_modalidad_norm"] = normalizar_texto_series(df["modalidad"])
-        dm["_modalidad_norm"] = normalizar_texto_series(dm["modalidad"])
-        dm = dm.drop_duplicates(subset=["_modalidad_norm"], keep="first")
-        df = df.merge(dm[["_modalidad_norm", "nombre"]], on="_modalidad_norm", how="left")
-        # Sustitución: si hay nombre en maestro, reemplaza el código de 'modalidad'
-        df["modalidad"] = df["nombre"].fillna(df["modalidad"])
-        total = len(df); matched = df["nombre"].notna().sum()
-        if total > 0: st.info(f"Maestro de modalidad: {matched} de {total} filas mapeadas ({matched/total:.1%}).")
-        no_match = df.loc[df["nombre"].isna(), "_modalidad_norm"].dropna().unique().tolist()
-        if no_match:
-            st.warning("Modalidades sin correspondencia (muestra máx. 20): " + ", ".join(no_match[:20]) + ("..." if len(no_match) > 20 else ""))
-        df.drop(columns=["_modalidad_norm", "nombre"], inplace=True, errors="ignore")
-
-    # Fijos
-    df["mercado"] = "EU"
-    df["idioma"] = "Español"
-    df["tipo_registro"] = "Guias"
-    df["marca"] = "Artika"
-    df["subcanal"] = "iArtika"
-
-    # Reordenar
-    cols = list(df.columns)
-    orden = ["id_integrador", "fecha_captacion", "nombre_pila", "primer_apellido"]
-    resto = [c for c in cols if c not in orden]
-    df = df[[c for c in orden if c in df.columns] + resto]
-    return df
-
-# ===== Utilidad: exportar a XLSX =====
-def dataframe_a_xlsx_bytes(df: pd.DataFrame, sheet_name: str = "datos") -> bytes:
-    buffer = io.BytesIO()
-    try:
-        with pd.ExcelWriter(buffer, engine="xlsxwriter") as w:
-            df.to_excel(w, index=False, sheet_name=sheet_name)
-            ws = w.sheets[sheet_name]
-            for i, col in enumerate(df.columns):
-                sample = df[col].astype(str).head(100).tolist()
-                max_len = max([len(col)] + [len(s) for s in sample]) + 2
-                ws.set_column(i, i, min(max_len, 50))
-    except Exception:
-        try:
-            from openpyxl.utils import get_column_letter  # type: ignore
-            with pd.ExcelWriter(buffer, engine="openpyxl") as w:
-                df.to_excel(w, index=False, sheet_name=sheet_name)
-                ws = w.sheets[sheet_name]
-                for i, col in enumerate(df.columns, start=1):
-                    sample = df[col].astype(str).head(100).tolist()
-                    max_len = max([len(col)] + [len(s) for s in sample]) + 2
-                    ws.column_dimensions[get_column_letter(i)].width = min(max_len, 50)
-        except Exception:
-            with pd.ExcelWriter(buffer, engine="openpyxl") as w:
-                df.to_excel(w, index=False, sheet_name=sheet_name)
-    buffer.seek(0)
-    return buffer.getvalue()
-
-# ================== FLUJO DE LA APP ==================
-if uploaded is None:
-    st.info("Sube un archivo CSV para comenzar.")
-else:
-    # Leemos CSV
-    try:
-        df_in = pd.read_csv(uploaded, encoding=enc_in, sep=sep_in)
-    except UnicodeDecodeError:
-        st.error("No se pudo leer con la codificación seleccionada. Prueba con 'latin-1'.")
-        st.stop()
-    except Exception as e:
-        st.error(f"No se pudo leer el CSV: {e}")
-        st.stop()
-
-    st.subheader("👀 Vista previa - Entrada")
-    st.dataframe(df_in.head(20), use_container_width=True)
-
-    start_id_value = None
-    if "Submission ID" in df_in.columns:
-        serie_num = pd.to_numeric(df_in["Submission ID"], errors="coerce").dropna()
-        if not serie_num.empty:
-            min_id = int(serie_num.min()); max_id = int(serie_num.max())
-            st.markdown("### 🔢 Procesar desde ID (id_integrador)")
-            start_id_value = st.number_input(
-                "Indica el ID desde el que quieres procesar (inclusivo).",
-                min_value=min_id, max_value=max_id, value=min_id, step=1,
-                help="Se eliminarán los registros con ID inferiores."
-            )
-        else:
-            st.error("La columna 'Submission ID' no contiene valores numéricos válidos.")
-    else:
-        st.info("No se encontró la columna 'Submission ID'. No se aplicará el filtro por ID de inicio.")
-
-    df_out = transformar(
-        df_in,
-        start_id_value=start_id_value,
-        df_paises=DF_MAESTRO_PAISES,
-        df_modalidad=DF_MAESTRO_MODALIDAD
-    )
-
-    st.subheader("✅ Vista previa - Salida")
-    st.dataframe(df_out.head(20), use_container_width=True)
-
-    data_xlsx = dataframe_a_xlsx_bytes(df_out, sheet_name="datos")
-    st.download_button(
-        label="⬇️ Descargar Excel transformado (.xlsx)",
-        data=data_xlsx,
-        file_name="descargas_transformado.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        use_container_width=True
-    )
-    st.success("Transformación completada. Puedes descargar el archivo arriba.")
+import os
+import tempfile
+from pathlib import Path
+import pandas as pd
+import streamlit as st
+
+import maestros
+import remoto
+from pipeline import transformar, filtrar_marca_agua, con_columnas_fijas, Informe
+from estado import EstadoIncremental
+from escritores import exportar_dataframe, FORMATOS
+from ingesta import detectar_formato, leer_csv
+from cache_etapas import CacheLRU, huella_bytes
+from perfilado import Perfilador, resumir_medidas
+from aproximado import CruceAproximado, TablaAlias
+
+# ================== CONFIG & ESTILOS ==================
+st.set_page_config(page_title="ARTIKA BOOKS - GUIAS", page_icon="📚", layout="wide")
+
+PRIMARY_COLOR = "#000722"
+BG_IMAGE = "https://artikabooks.com/wp-content/uploads/2025/02/Banner_Artika_ok-scaled.jpg"
+LOGO_URL = "https://artikabooks.com/wp-content/uploads/2024/01/logo-artikabooks.svg"
+
+st.markdown(
+    f"""
+    <style>
+        div[data-testid="stDecoration"] {{ display:none !important; }}
+        header[data-testid="stHeader"] {{ background:transparent !important; box-shadow:none !important; border-bottom:none !important; }}
+        html, body, [data-testid="stAppViewContainer"] {{ margin:0 !important; padding:0 !important; }}
+        .stApp {{
+            background: linear-gradient(rgba(255,255,255,0.5), rgba(255,255,255,0.5)),
+                        url("{BG_IMAGE}");
+            background-size: cover; background-position:center; color:{PRIMARY_COLOR};
+        }}
+        .header-container {{ display:flex; align-items:center; justify-content:flex-start; background:white; padding:16px 26px; border-radius:12px; margin-bottom:16px; border:1px solid rgba(0,0,0,0.06); }}
+        .header-logo {{height:54px; margin-right:18px;}}
+        .header-title {{font-size:28px; font-weight:800; color:{PRIMARY_COLOR};}}
+        h1,h2,h3,h4,h5,h6,p,label,span,div {{ color:{PRIMARY_COLOR} !important; }}
+        .stSelectbox div[data-baseweb="select"] > div {{ background:white !important; color:{PRIMARY_COLOR} !important; border:1px solid {PRIMARY_COLOR} !important; border-radius:6px !important; }}
+        .stSelectbox div[data-baseweb="select"] svg {{ fill:{PRIMARY_COLOR} !important; }}
+        div[data-baseweb="popover"], div[role="listbox"], div[role="option"] {{ background:white !important; color:{PRIMARY_COLOR} !important; }}
+        div[role="listbox"] {{ border:1px solid {PRIMARY_COLOR} !important; border-radius:8px !important; }}
+        div[role="option"]:hover {{ background:#e6eaf5 !important; }}
+        .stFileUploader [data-testid="stFileUploaderDropzone"] {{ background:white !important; border:2px dashed {PRIMARY_COLOR} !important; border-radius:10px !important; }}
+        .stTextInput input, .stNumberInput input[type="number"] {{ background:white !important; color:{PRIMARY_COLOR} !important; border:1px solid {PRIMARY_COLOR} !important; border-radius:6px !important; }}
+        .stDownloadButton button {{ background:white !important; color:{PRIMARY_COLOR} !important; border:1px solid {PRIMARY_COLOR} !important; border-radius:6px !important; font-weight:600 !important; padding:6px 16px !important; }}
+        .stDownloadButton button:hover {{ background:#e6eaf5 !important; }}
+        section[data-testid="stSidebar"] > div {{ background:rgba(255,255,255,0.92); padding:8px 10px; border-left:1px solid rgba(0,0,0,0.06); }}
+        section[data-testid="stSidebar"] * {{ color:{PRIMARY_COLOR} !important; }}
+        div[data-testid="stDataFrame"] {{ background:rgba(255,255,255,0.85); border-radius:10px; padding:6px; }}
+    </style>
+    """,
+    unsafe_allow_html=True
+)
+
+# Cabecera
+st.markdown(
+    f"""
+    <div class="header-container">
+        <img src="{LOGO_URL}" class="header-logo">
+        <div class="header-title">    CAPTACIÓN - GUIAS</div>
+    </div>
+    """,
+    unsafe_allow_html=True
+)
+
+st.caption("Carga un CSV, aplica el pipeline de transformación y descarga el resultado en Excel (.xlsx), CSV.gz, Parquet o NDJSON.")
+
+# ================== SIDEBAR ==================
+with st.sidebar:
+    st.header("🧩 Maestro de modalidad")
+    url_modalidad = st.text_input("URL RAW de GitHub (opcional)", placeholder="https://raw.githubusercontent.com/.../modalidad.xlsx")
+    st.header("📦 Salida")
+    formato_salida = st.selectbox(
+        "Formato de salida", list(FORMATOS), index=0,
+        help="Excel para revisión manual; CSV.gz, Parquet o NDJSON son mucho más rápidos para la carga en el CRM."
+    )
+    st.header("🔁 Procesamiento incremental")
+    modo_incremental = st.checkbox(
+        "Solo registros nuevos (marca de agua)", value=False,
+        help="Omite los IDs ya procesados y los leads ya entregados. La marca de agua avanza al descargar el resultado."
+    )
+    st.header("🔎 Cruce con maestros")
+    sugerir_aproximado = st.checkbox(
+        "Sugerir correspondencias aproximadas", value=False,
+        help="Para países y modalidades sin coincidencia exacta, propone la entrada más parecida del maestro. Las que aceptes se guardan como alias."
+    )
+    debug_mode = st.checkbox("🔧 Modo diagnóstico", value=False, help="Muestra rutas y archivos reales en el entorno")
+
+uploaded = st.file_uploader("📤 Sube tu archivo CSV", type=["csv"])
+
+# ================== UTILIDADES ==================
+@st.cache_data(show_spinner=False)
+def listar_archivos(d: Path) -> list[str]:
+    try:
+        return sorted([p.name for p in d.iterdir() if p.is_file()])
+    except Exception:
+        return []
+
+# ========== CARGA MAESTRO PAÍSES ==========
+# La clave de caché es la firma (ruta, tamaño, mtime) del fichero localizado:
+# si se sustituye el maestro, el siguiente rerun lo recarga
+@st.cache_data(show_spinner=False)
+def cargar_maestro_paises(firma: tuple) -> tuple[pd.DataFrame | None, str, list[str], str, str]:
+    return maestros.cargar_maestro_paises()
+
+DF_MAESTRO_PAISES, ORIGEN_PAISES, RUTAS_PAISES, APPDIR, CWD = cargar_maestro_paises(maestros.firma_maestro("paises"))
+if maestros.maestro_paises_valido(DF_MAESTRO_PAISES):
+    st.caption(f"✅ Maestro de países cargado desde: {ORIGEN_PAISES}")
+    st.dataframe(DF_MAESTRO_PAISES.head(10), use_container_width=True)
+else:
+    st.error("❌ No se encontró/valida el maestro de países 'Paises_landing_ISO.xlsx' (faltan columnas 'País' y 'País_normalizado').")
+    with st.expander("Rutas probadas (países)"):
+        st.code("\n".join(RUTAS_PAISES))
+
+# ========== CARGA MAESTRO MODALIDAD (usa columnas EXACTAS: 'modalidad' y 'nombre') ==========
+@st.cache_data(show_spinner=False)
+def cargar_maestro_modalidad_local(firma: tuple):
+    return maestros.cargar_maestro_modalidad()
+
+def cargar_maestro_modalidad(url_hint: str | None = None):
+    # La URL no pasa por st.cache_data: remoto.py la cachea en disco y la revalida
+    # con ETag, y sin copia local no bloquea la página más de PLAZO_POR_DEFECTO
+    if not url_hint:
+        return cargar_maestro_modalidad_local(maestros.firma_maestro("modalidad"))
+    return maestros.cargar_maestro_modalidad(url_hint, plazo_url=remoto.PLAZO_POR_DEFECTO)
+
+DF_MAESTRO_MODALIDAD, ORIGEN_MODALIDAD, RUTAS_MODALIDAD, APPDIR, CWD = cargar_maestro_modalidad(url_modalidad.strip() or None)
+if RUTAS_MODALIDAD and RUTAS_MODALIDAD[0].startswith("(URL no disponible"):
+    st.warning(f"⚠️ {RUTAS_MODALIDAD[0].strip('()')}.")
+if DF_MAESTRO_MODALIDAD is None:
+    st.error("❌ No se encontró el maestro 'modalidad.xlsx'.")
+    with st.expander("Rutas/criterios probados (modalidad)"):
+        st.code("\n".join(RUTAS_MODALIDAD))
+else:
+    # 👉 Validamos EXACTAMENTE estas columnas: 'modalidad' y 'nombre'
+    if not maestros.maestro_modalidad_valido(DF_MAESTRO_MODALIDAD):
+        st.warning(
+            f"⚠️ Maestro de modalidad cargado desde {ORIGEN_MODALIDAD}, "
+            f"pero faltan columnas 'modalidad' y/o 'nombre'. Columnas detectadas: {list(DF_MAESTRO_MODALIDAD.columns)}"
+        )
+    else:
+        st.success(f"✅ Maestro de modalidad cargado correctamente desde: {ORIGEN_MODALIDAD} ({len(DF_MAESTRO_MODALIDAD)} filas)")
+    st.dataframe(DF_MAESTRO_MODALIDAD.head(10), use_container_width=True)
+
+# Estado incremental (marca de agua + índice de dedup)
+DIR_ESTADO = Path(APPDIR) / ".estado_incremental"
+
+# ========= PANEL DIAGNÓSTICO OPCIONAL =========
+if debug_mode:
+    st.subheader("🔧 Diagnóstico del entorno")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("`__file__`:", __file__)
+        st.write("`APPDIR`:", APPDIR)
+        st.write("`CWD`:", CWD)
+    with col2:
+        st.write("Archivos en APPDIR:")
+        st.code("\n".join(listar_archivos(Path(APPDIR))) or "(no se pudieron listar)")
+        st.write("Archivos en ./data:")
+        st.code("\n".join(listar_archivos(Path(APPDIR) / "data")) or "(no se pudieron listar)")
+
+# ===== Utilidad: exportar =====
+def exportar_a_temporal(df: pd.DataFrame, formato: str) -> Path:
+    """Escribe el resultado en streaming (memoria constante) a un fichero temporal."""
+    fd, tmp = tempfile.mkstemp(suffix=FORMATOS[formato].extension)
+    os.close(fd)
+    return exportar_dataframe(df, tmp, formato)
+
+def _borrar_temporal(exportado: tuple[Path, list]) -> None:
+    exportado[0].unlink(missing_ok=True)
+
+# ===== Caché por etapas (por sesión, LRU acotada) =====
+def cache_etapa(nombre: str, max_entradas: int, al_expulsar=None) -> CacheLRU:
+    if nombre not in st.session_state:
+        st.session_state[nombre] = CacheLRU(max_entradas, al_expulsar)
+    return st.session_state[nombre]
+
+def huella_subida(uploaded) -> str:
+    """Hash del contenido subido, memoizado por file_id para no rehashear en cada rerun."""
+    huellas = st.session_state.setdefault("huellas_subidas", {})
+    file_id = getattr(uploaded, "file_id", None)
+    if file_id is None or file_id not in huellas:
+        huella = huella_bytes(uploaded.getbuffer())
+        if file_id is None:
+            return huella
+        huellas.clear()
+        huellas[file_id] = huella
+    return huellas[file_id]
+
+def leer_subida(uploaded):
+    """Separador y codificación autodetectados, solo columnas necesarias y tipadas."""
+    uploaded.seek(0)
+    formato_in = detectar_formato(uploaded)
+    try:
+        return leer_csv(uploaded, formato=formato_in), formato_in
+    except UnicodeDecodeError:
+        # La muestra parecía UTF-8 pero el resto del archivo no lo es
+        uploaded.seek(0)
+        formato_in = detectar_formato(uploaded, sep=formato_in.sep, encoding="latin-1")
+        return leer_csv(uploaded, formato=formato_in), formato_in
+
+def leer_subida_perfilada(uploaded):
+    """leer_subida + medida de la etapa (se cachea junto al resultado)."""
+    perfil = Perfilador()
+    with perfil.etapa("lectura_csv") as m:
+        df_in, formato_in = leer_subida(uploaded)
+        m.filas_salida = len(df_in)
+    return df_in, formato_in, perfil.medidas
+
+# ================== FLUJO DE LA APP ==================
+if uploaded is None:
+    st.info("Sube un archivo CSV para comenzar.")
+else:
+    # Etapa 1: lectura (clave: contenido del CSV)
+    clave_csv = huella_subida(uploaded)
+    try:
+        df_in, formato_in, medidas_lectura = cache_etapa("cache_lectura", 2).obtener_o_calcular(clave_csv, lambda: leer_subida_perfilada(uploaded))
+    except Exception as e:
+        st.error(f"No se pudo leer el CSV: {e}")
+        st.stop()
+    sep_visible = {"\t": "tabulador"}.get(formato_in.sep, formato_in.sep)
+    st.caption(f"Detectado: separador «{sep_visible}», codificación {formato_in.encoding}.")
+
+    st.subheader("👀 Vista previa - Entrada")
+    st.dataframe(df_in.head(20), use_container_width=True)
+
+    start_id_value = None
+    estado = EstadoIncremental.cargar(DIR_ESTADO) if modo_incremental else None
+    if estado is not None:
+        if estado.ultimo_id is not None:
+            st.info(f"🔁 Modo incremental: se procesarán solo los registros con ID mayor que **{estado.ultimo_id}**.")
+        else:
+            st.info("🔁 Modo incremental: aún no hay marca de agua; se procesará el archivo completo.")
+    elif "Submission ID" in df_in.columns:
+        serie_num = pd.to_numeric(df_in["Submission ID"], errors="coerce").dropna()
+        if not serie_num.empty:
+            min_id = int(serie_num.min()); max_id = int(serie_num.max())
+            st.markdown("### 🔢 Procesar desde ID (id_integrador)")
+            start_id_value = st.number_input(
+                "Indica el ID desde el que quieres procesar (inclusivo).",
+                min_value=min_id, max_value=max_id, value=min_id, step=1,
+                help="Se eliminarán los registros con ID inferiores."
+            )
+        else:
+            st.error("La columna 'Submission ID' no contiene valores numéricos válidos.")
+    else:
+        st.info("No se encontró la columna 'Submission ID'. No se aplicará el filtro por ID de inicio.")
+
+    # Etapa 2: transformación (clave: CSV + versiones de maestros + ID de inicio + estado incremental)
+    idx_paises = maestros.indice_paises(DF_MAESTRO_PAISES)
+    idx_modalidad = maestros.indice_modalidad(DF_MAESTRO_MODALIDAD)
+    version_estado = None
+    if estado is not None:
+        ruta_dedup = estado.ruta_dedup
+        version_estado = (estado.ultimo_id, ruta_dedup.stat().st_mtime_ns if ruta_dedup.exists() else None)
+    # Los alias aprendidos se aplican siempre; al guardar nuevos cambia su versión y se recalcula
+    alias = TablaAlias.cargar()
+    clave_transformado = (
+        clave_csv,
+        idx_paises.huella if idx_paises is not None else None,
+        idx_modalidad.huella if idx_modalidad is not None else None,
+        None if start_id_value is None else int(start_id_value),
+        version_estado,
+        alias.version,
+        sugerir_aproximado,
+    )
+
+    def _transformar():
+        informe = Informe()
+        perfil = Perfilador()
+        dedup = estado.cargar_dedup() if estado is not None else None
+        with perfil.etapa("marca_agua", len(df_in)) as m:
+            df_filtrado = filtrar_marca_agua(df_in, estado.ultimo_id if estado is not None else None, informe)
+            m.filas_salida = len(df_filtrado)
+        df_out = transformar(
+            df_filtrado,
+            start_id_value=start_id_value,
+            df_paises=idx_paises,
+            df_modalidad=idx_modalidad,
+            informe=informe,
+            dedup=dedup,
+            perfil=perfil,
+            cruce=CruceAproximado(alias, sugerir=sugerir_aproximado)
+        )
+        return df_out, informe, dedup, perfil.medidas
+
+    df_out, informe, dedup, medidas_transformado = cache_etapa("cache_transformado", 3).obtener_o_calcular(clave_transformado, _transformar)
+    for nivel, texto in informe.mensajes():
+        getattr(st, nivel)(texto)
+
+    # Sugerencias del cruce aproximado: las marcadas se guardan como alias
+    pendientes = [(m, s) for m, sugerencias in (("paises", informe.paises_sugerencias),
+                                                ("modalidad", informe.modalidad_sugerencias))
+                  for s in sugerencias.values() if not s.aceptada]
+    if pendientes:
+        st.subheader("🔎 Correspondencias sugeridas")
+        tabla = pd.DataFrame({
+            "Aceptar": [False] * len(pendientes),
+            "Maestro": [m for m, _ in pendientes],
+            "Valor en el CSV": [s.clave for _, s in pendientes],
+            "Sugerencia": [s.valor for _, s in pendientes],
+            "Confianza": [s.confianza for _, s in pendientes],
+        })
+        editada = st.data_editor(tabla, disabled=["Maestro", "Valor en el CSV", "Sugerencia", "Confianza"],
+                                 hide_index=True, use_container_width=True, key="editor_sugerencias")
+        if st.button("💾 Guardar las aceptadas como alias", disabled=not editada["Aceptar"].any()):
+            for (m, s), aceptar in zip(pendientes, editada["Aceptar"]):
+                if aceptar:
+                    alias.agregar(m, s.clave, s.valor)
+            alias.guardar()
+            st.rerun()
+
+    st.subheader("✅ Vista previa - Salida")
+    st.dataframe(con_columnas_fijas(df_out.head(20)), use_container_width=True)
+
+    # Etapa 3: exportación, solo cuando se pide (clave: transformación + formato)
+    escritor = FORMATOS[formato_salida]
+    clave_export = (clave_transformado, formato_salida)
+    cache_export = cache_etapa("cache_exportado", 2, al_expulsar=_borrar_temporal)
+    if clave_export not in cache_export:
+        if st.button(f"⚙️ Generar archivo para descargar ({escritor.extension})", use_container_width=True):
+            def _exportar():
+                perfil = Perfilador()
+                with perfil.etapa("exportacion", len(df_out)) as m:
+                    ruta = exportar_a_temporal(df_out, formato_salida)
+                    m.filas_salida = len(df_out)
+                return ruta, perfil.medidas
+
+            with st.spinner("Generando archivo..."):
+                cache_export.obtener_o_calcular(clave_export, _exportar)
+    medidas_exportacion = []
+    if clave_export in cache_export:
+        ruta_export, medidas_exportacion = cache_export.obtener(clave_export)
+        # El resultado vive en un temporal, no en la caché de la app; pero download_button
+        # lee el fichero completo en su gestor de medios en cada rerun con el botón visible
+        with open(ruta_export, "rb") as f:
+            st.download_button(
+                label=f"⬇️ Descargar archivo transformado ({escritor.extension})",
+                data=f,
+                file_name=f"descargas_transformado{escritor.extension}",
+                mime=escritor.mime,
+                use_container_width=True,
+                on_click=estado.guardar if estado is not None else None,
+                args=(dedup, informe.id_maximo) if estado is not None else None
+            )
+        st.success("Transformación completada. Puedes descargar el archivo arriba.")
+    else:
+        st.success("Transformación completada. Genera el archivo para descargarlo.")
+
+    # ========= PERFIL POR ETAPAS (diagnóstico) =========
+    if debug_mode:
+        st.subheader("⏱️ Perfil por etapas")
+        st.caption("Medidas de la última ejecución real de cada etapa (los resultados cacheados no se vuelven a medir).")
+        st.dataframe(resumir_medidas(medidas_lectura + medidas_transformado + medidas_exportacion),
+                     use_container_width=True)
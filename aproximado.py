@@ -0,0 +1,159 @@
+"""
+Cruce aproximado para las claves que no casan exactamente con un maestro
+(países, modalidad) y tabla de alias aprendidos.
+
+- IndiceNgramas: índice invertido de trigramas sobre las claves normalizadas
+  del maestro, construido una vez por contenido (huella del IndiceLookup).
+  La similitud es el coeficiente de Dice entre conjuntos de trigramas.
+- CruceAproximado: se aplica solo a las claves únicas sin coincidencia (nunca
+  por fila) y recuerda las ya consultadas entre chunks. Primero consulta los
+  alias aprendidos (O(1)); después, si está activado, busca sugerencias con
+  confianza >= `umbral`. Las de confianza >= `aceptar_desde` se aceptan:
+  se aplican a la salida y quedan marcadas para guardarlas como alias.
+- TablaAlias: alias aceptados por maestro (clave normalizada → valor), en
+  JSON, para que las ejecuciones siguientes los resuelvan sin cruce aproximado.
+"""
+import hashlib
+import json
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable
+import numpy as np
+
+from ficheros import escribir_atomico
+from maestros import APPDIR, IndiceLookup
+
+FICHERO_ALIAS = APPDIR / "alias_maestros.json"
+TAM_NGRAMA = 3
+UMBRAL_SUGERENCIA = 0.6
+CLAVES_IGNORADAS = {"", "nan", "none"}
+
+def ngramas(clave: str) -> set[str]:
+    """Trigramas con relleno, para que los inicios de palabra pesen."""
+    s = f"  {clave} "
+    return {s[i:i + TAM_NGRAMA] for i in range(len(s) - TAM_NGRAMA + 1)}
+
+@dataclass(frozen=True)
+class Sugerencia:
+    clave: str
+    clave_maestro: str
+    valor: str
+    confianza: float
+    aceptada: bool = False
+
+class IndiceNgramas:
+    def __init__(self, indice: IndiceLookup):
+        self.claves = indice.claves.to_numpy(dtype=object)
+        self.valores = indice.valores
+        conjuntos = [ngramas(str(c)) for c in self.claves]
+        self.tamanos = np.array([len(g) for g in conjuntos], dtype=np.int32)
+        listas: dict[str, list[int]] = {}
+        for i, gs in enumerate(conjuntos):
+            for g in gs:
+                listas.setdefault(g, []).append(i)
+        self.listas = {g: np.array(ids, dtype=np.int32) for g, ids in listas.items()}
+
+    def mejor(self, clave: str) -> tuple[int, float] | None:
+        """(posición de la clave del maestro más parecida, confianza) o None."""
+        q = ngramas(clave)
+        comunes = [self.listas[g] for g in q if g in self.listas]
+        if not comunes:
+            return None
+        cuenta = np.bincount(np.concatenate(comunes), minlength=len(self.claves))
+        dice = 2 * cuenta / (len(q) + self.tamanos)
+        pos = int(np.argmax(dice))
+        return pos, float(dice[pos])
+
+_CACHE_NGRAMAS: dict[str, IndiceNgramas] = {}
+
+def indice_ngramas(indice: IndiceLookup) -> IndiceNgramas:
+    if indice.huella not in _CACHE_NGRAMAS:
+        _CACHE_NGRAMAS[indice.huella] = IndiceNgramas(indice)
+    return _CACHE_NGRAMAS[indice.huella]
+
+# ================== ALIAS APRENDIDOS ==================
+class TablaAlias:
+    def __init__(self, ruta: Path | None = None, alias: dict[str, dict[str, str]] | None = None):
+        self.ruta = Path(ruta) if ruta is not None else FICHERO_ALIAS
+        self.alias = alias or {}
+
+    @classmethod
+    def cargar(cls, ruta: str | Path | None = None) -> "TablaAlias":
+        ruta = Path(ruta) if ruta is not None else FICHERO_ALIAS
+        if not ruta.exists():
+            return cls(ruta)
+        return cls(ruta, json.loads(ruta.read_text(encoding="utf-8")))
+
+    def para(self, maestro: str) -> dict[str, str]:
+        return self.alias.get(maestro, {})
+
+    def agregar(self, maestro: str, clave: str, valor: str) -> None:
+        self.alias.setdefault(maestro, {})[clave] = valor
+
+    def agregar_aceptadas(self, maestro: str, sugerencias: dict[str, Sugerencia]) -> int:
+        aceptadas = [s for s in sugerencias.values() if s.aceptada]
+        for s in aceptadas:
+            self.agregar(maestro, s.clave, s.valor)
+        return len(aceptadas)
+
+    @property
+    def version(self) -> str:
+        """Hash del contenido (para claves de caché)."""
+        return hashlib.sha1(json.dumps(self.alias, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def guardar(self) -> None:
+        escribir_atomico(self.ruta, json.dumps(self.alias, ensure_ascii=False, indent=2, sort_keys=True))
+
+# ================== CRUCE APROXIMADO ==================
+class CruceAproximado:
+    """
+    Estado del cruce aproximado entre chunks. `sugerir=False` deja solo los
+    alias aprendidos. `aceptar_desde=None` no acepta nada automáticamente.
+    """
+    def __init__(self, alias: TablaAlias | None = None, sugerir: bool = True,
+                 umbral: float = UMBRAL_SUGERENCIA, aceptar_desde: float | None = None):
+        self.alias = alias if alias is not None else TablaAlias()
+        self.sugerir = sugerir
+        self.umbral = umbral
+        self.aceptar_desde = aceptar_desde
+        self._consultadas: dict[str, dict[str, str | None]] = {}
+
+    def resolver(self, maestro: str, indice: IndiceLookup,
+                 sugerencias: dict[str, Sugerencia]) -> Callable[[list[str]], list]:
+        """
+        Función para IndiceLookup.buscar: valor (o None) por cada clave sin
+        coincidencia exacta. Las sugerencias encontradas se anotan en `sugerencias`.
+        """
+        consultadas = self._consultadas.setdefault(maestro, {})
+        alias = self.alias.para(maestro)
+
+        def resolver(claves: list[str]) -> list:
+            res = []
+            for clave in claves:
+                if clave in alias:
+                    res.append(alias[clave])
+                    continue
+                if clave not in consultadas:
+                    consultadas[clave] = None
+                    s = self._sugerir(clave, indice) if self.sugerir else None
+                    if s is not None:
+                        sugerencias[clave] = s
+                        if s.aceptada:
+                            consultadas[clave] = s.valor
+                res.append(consultadas[clave])
+            return res
+        return resolver
+
+    def _sugerir(self, clave: str, indice: IndiceLookup) -> Sugerencia | None:
+        if clave in CLAVES_IGNORADAS or len(indice) == 0:
+            return None
+        ngr = indice_ngramas(indice)
+        mejor = ngr.mejor(clave)
+        if mejor is None or mejor[1] < self.umbral:
+            return None
+        pos, confianza = mejor
+        aceptada = self.aceptar_desde is not None and confianza >= self.aceptar_desde
+        return Sugerencia(clave, str(ngr.claves[pos]), str(ngr.valores[pos]), round(confianza, 3), aceptada)
+
+def sugerencias_a_registros(sugerencias: dict[str, Sugerencia]) -> list[dict]:
+    return [asdict(s) for s in sugerencias.values()]
@@ -0,0 +1,233 @@
+"""
+Benchmark reproducible del pipeline: genera (o reutiliza) exports sintéticos
+de varios tamaños, los procesa midiendo cada etapa con `perfilado.Perfilador`
+y guarda los resultados en bench/resultados/ para comparar ejecuciones.
+
+Cada tamaño se ejecuta en un proceso nuevo, de modo que el pico de RSS es el
+de esa ejecución y no arrastra memoria de la anterior. Los datasets se
+cachean en bench/.datos/ por parámetros (mismo fichero para la misma semilla).
+
+Ejemplos:
+    python bench/benchmark.py                                   # 10k y 1M, modo streaming
+    python bench/benchmark.py --filas 10000 1000000 10000000 --repeticiones 3
+    python bench/benchmark.py --modo completo --formato xlsx --filas 10000
+    python bench/benchmark.py --comparar bench/resultados/20250101-030000.json --umbral 10
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from multiprocessing import get_context
+from pathlib import Path
+import pandas as pd
+
+DIR_BENCH = Path(__file__).resolve().parent
+sys.path.insert(0, str(DIR_BENCH.parent))
+
+import maestros
+from perfilado import Perfilador, resumir_medidas, MedidaEtapa
+from pipeline import Informe, procesar_csv, transformar, filtrar_marca_agua
+from generador import ParametrosGenerador, generar_csv, valores_maestros
+
+DIR_DATOS = DIR_BENCH / ".datos"
+DIR_RESULTADOS = DIR_BENCH / "resultados"
+FILAS_POR_DEFECTO = [10_000, 1_000_000]
+MODOS = ["streaming", "completo"]
+
+# ================== EJECUCIÓN DE UN TAMAÑO (PROCESO AISLADO) ==================
+def _ejecutar(csv: Path, modo: str, formato: str, tracemalloc: bool) -> dict:
+    from escritores import exportar_dataframe
+    from ingesta import leer_csv
+
+    df_paises = maestros.cargar_maestro_paises()[0]
+    df_modalidad = maestros.cargar_maestro_modalidad()[0]
+    perfil = Perfilador(tracemalloc=tracemalloc)
+    with perfil.etapa("maestros") as m:
+        idx_paises = maestros.indice_paises(df_paises)
+        idx_modalidad = maestros.indice_modalidad(df_modalidad)
+
+    destino = DIR_DATOS / f"salida_{os.getpid()}.{formato}"
+    t0 = time.perf_counter()
+    if modo == "streaming":
+        informe = procesar_csv(csv, destino, formato, perfil=perfil,
+                               df_paises=idx_paises, df_modalidad=idx_modalidad)
+    else:
+        # Como la app: lectura completa, transformación en memoria y exportación
+        informe = Informe()
+        with perfil.etapa("lectura_csv") as m:
+            df = leer_csv(csv)
+            m.filas_salida = len(df)
+        informe.filas_leidas = len(df)
+        df = transformar(filtrar_marca_agua(df, None, informe), df_paises=idx_paises,
+                         df_modalidad=idx_modalidad, informe=informe, perfil=perfil)
+        with perfil.etapa("exportacion", len(df)) as m:
+            exportar_dataframe(df, destino, formato)
+            m.filas_salida = len(df)
+    segundos = time.perf_counter() - t0
+    destino.unlink(missing_ok=True)
+    return {
+        "segundos_total": segundos,
+        "filas_leidas": informe.filas_leidas,
+        "filas_salida": informe.filas_salida,
+        "rss_max_mb": max((m.rss_max_mb or 0) for m in perfil.medidas),
+        "medidas": [asdict(m) for m in perfil.medidas],
+    }
+
+def _generar(ruta: Path, p: ParametrosGenerador) -> Path:
+    paises, modalidades = valores_maestros(maestros.cargar_maestro_paises()[0],
+                                           maestros.cargar_maestro_modalidad()[0])
+    return generar_csv(ruta, p, paises, modalidades)
+
+def _en_proceso_nuevo(funcion, *args):
+    # ru_maxrss se hereda al crear el proceso: el principal debe quedarse pequeño
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(funcion, *args).result()
+
+def _dataset(filas: int, semilla: int) -> Path:
+    p = ParametrosGenerador(filas=filas, semilla=semilla)
+    ruta = DIR_DATOS / p.nombre_fichero()
+    if not ruta.exists():
+        print(f"Generando {filas:,} filas en {ruta.name}...", file=sys.stderr)
+        _en_proceso_nuevo(_generar, ruta, p)
+    return ruta
+
+def _version_git() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=DIR_BENCH, capture_output=True,
+                              text=True, check=True).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _entorno() -> dict:
+    import numpy as np
+    import pyarrow as pa  # type: ignore
+    return {
+        "git": _version_git(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pyarrow": pa.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+def ejecutar_benchmark(filas: list[int], modo: str = "streaming", formato: str = "parquet",
+                       repeticiones: int = 1, semilla: int = 42, tracemalloc: bool = False) -> dict:
+    """Ejecuta todos los tamaños y devuelve el resultado serializable a JSON."""
+    resultado = {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "entorno": _entorno(),
+        "parametros": {"modo": modo, "formato": formato, "repeticiones": repeticiones,
+                       "semilla": semilla, "tracemalloc": tracemalloc},
+        "tamanos": [],
+    }
+    for n in filas:
+        csv = _dataset(n, semilla)
+        ejecuciones = []
+        for _ in range(repeticiones):
+            ejecuciones.append(_en_proceso_nuevo(_ejecutar, csv, modo, formato, tracemalloc))
+        # Se resume con la mediana por etapa entre repeticiones
+        etapas = pd.concat([resumir_medidas([MedidaEtapa(**m) for m in e["medidas"]]) for e in ejecuciones])
+        etapas = etapas.set_index("etapa").apply(pd.to_numeric).groupby(level=0, sort=False).median().reset_index()
+        segundos = float(pd.Series([e["segundos_total"] for e in ejecuciones]).median())
+        resultado["tamanos"].append({
+            "filas": n,
+            "segundos_total": segundos,
+            "filas_por_segundo": n / segundos if segundos else None,
+            "rss_max_mb": max(e["rss_max_mb"] for e in ejecuciones),
+            "filas_salida": ejecuciones[0]["filas_salida"],
+            "etapas": etapas.astype(object).where(etapas.notna(), None).to_dict(orient="records"),
+            "ejecuciones_segundos": [e["segundos_total"] for e in ejecuciones],
+        })
+        print(f"{n:>12,} filas: {segundos:8.2f} s  "
+              f"({resultado['tamanos'][-1]['rss_max_mb']:.0f} MB RSS máx.)", file=sys.stderr)
+    return resultado
+
+def guardar_resultado(resultado: dict, directorio: Path = DIR_RESULTADOS) -> Path:
+    directorio.mkdir(parents=True, exist_ok=True)
+    git = resultado["entorno"].get("git") or "sin-git"
+    ruta = directorio / f"{time.strftime('%Y%m%d-%H%M%S')}_{git}_{resultado['parametros']['modo']}.json"
+    ruta.write_text(json.dumps(resultado, ensure_ascii=False, indent=2), encoding="utf-8")
+    return ruta
+
+# ================== COMPARACIÓN ENTRE EJECUCIONES ==================
+def _por_etapa(resultado: dict) -> pd.DataFrame:
+    filas = []
+    for t in resultado["tamanos"]:
+        filas.append({"filas": t["filas"], "etapa": "TOTAL", "segundos": t["segundos_total"], "rss_max_mb": t["rss_max_mb"]})
+        filas += [{"filas": t["filas"], "etapa": e["etapa"], "segundos": e["segundos"], "rss_max_mb": e["rss_max_mb"]}
+                  for e in t["etapas"]]
+    return pd.DataFrame(filas)
+
+def comparar(base: dict, actual: dict, umbral_pct: float = 10.0) -> pd.DataFrame:
+    """
+    Tabla por tamaño y etapa con los segundos de ambas ejecuciones, la variación
+    en % y si supera `umbral_pct` (regresión). Las etapas de menos de 10 ms no
+    se marcan: su variación es ruido.
+    """
+    # Solo los tamaños/etapas de la ejecución actual, en su orden
+    tabla = _por_etapa(actual).merge(_por_etapa(base), on=["filas", "etapa"], how="left",
+                                     suffixes=("_actual", "_base"))
+    tabla = tabla[["filas", "etapa", "segundos_base", "segundos_actual", "rss_max_mb_base", "rss_max_mb_actual"]]
+    tabla["variacion_pct"] = (100 * (tabla["segundos_actual"] / tabla["segundos_base"] - 1)).round(1)
+    tabla["regresion"] = (tabla["variacion_pct"] > umbral_pct) & (tabla["segundos_base"] >= 0.01)
+    return tabla
+
+# ================== CLI ==================
+def construir_parser() -> argparse.ArgumentParser:
+    a = argparse.ArgumentParser(description="Benchmark por etapas del pipeline con datos sintéticos.")
+    a.add_argument("--filas", type=int, nargs="+", default=FILAS_POR_DEFECTO,
+                   help="Tamaños a medir (p. ej. 10000 1000000 10000000)")
+    a.add_argument("--modo", choices=MODOS, default="streaming",
+                   help="streaming: como la CLI (por chunks); completo: como la app (todo en memoria)")
+    a.add_argument("--formato", default="parquet", help="Formato de salida de la etapa de exportación")
+    a.add_argument("--repeticiones", type=int, default=1)
+    a.add_argument("--semilla", type=int, default=ParametrosGenerador.semilla)
+    a.add_argument("--tracemalloc", action="store_true", help="Mide el pico de memoria Python por etapa (más lento)")
+    a.add_argument("--sin-guardar", action="store_true", help="No guarda el resultado en bench/resultados/")
+    a.add_argument("--comparar", type=Path, default=None,
+                   help="Resultado previo (JSON) con el que comparar (por defecto, el último guardado con el mismo modo y formato)")
+    a.add_argument("--umbral", type=float, default=10.0, help="% de empeoramiento que se considera regresión")
+    return a
+
+def _ultimo_resultado(parametros: dict, excluir: Path | None = None) -> Path | None:
+    """Último resultado guardado con el mismo modo y formato (comparables entre sí)."""
+    rutas = sorted(DIR_RESULTADOS.glob("*.json"), reverse=True) if DIR_RESULTADOS.exists() else []
+    for ruta in rutas:
+        if ruta == excluir:
+            continue
+        previos = json.loads(ruta.read_text(encoding="utf-8")).get("parametros", {})
+        if all(previos.get(k) == parametros[k] for k in ("modo", "formato", "tracemalloc")):
+            return ruta
+    return None
+
+def main(argv: list[str] | None = None) -> int:
+    args = construir_parser().parse_args(argv)
+    DIR_DATOS.mkdir(parents=True, exist_ok=True)
+    resultado = ejecutar_benchmark(args.filas, args.modo, args.formato, args.repeticiones,
+                                   args.semilla, args.tracemalloc)
+    ruta = None
+    if not args.sin_guardar:
+        ruta = guardar_resultado(resultado)
+        print(f"Resultado guardado en {ruta}", file=sys.stderr)
+
+    for t in resultado["tamanos"]:
+        print(f"\n=== {t['filas']:,} filas ({t['segundos_total']:.2f} s, {t['filas_por_segundo']:,.0f} filas/s) ===")
+        print(pd.DataFrame(t["etapas"]).to_string(index=False))
+
+    base = args.comparar or _ultimo_resultado(resultado["parametros"], excluir=ruta)
+    if base is None:
+        return 0
+    tabla = comparar(json.loads(base.read_text(encoding="utf-8")), resultado, args.umbral)
+    print(f"\n=== Comparación con {base.name} ===")
+    print(tabla.to_string(index=False))
+    # Código de salida 1 si hay regresiones (útil en la ejecución nocturna)
+    return 1 if tabla["regresion"].any() else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
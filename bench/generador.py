@@ -0,0 +1,192 @@
+"""
+Generador reproducible de exports sintéticos con el esquema real del CSV de
+formularios (COLUMNAS_NECESARIAS), para el benchmark del pipeline.
+
+Con la misma semilla y parámetros produce exactamente el mismo fichero. Se
+escribe por bloques, así que generar 10M de filas no necesita tenerlas en
+memoria. Incluye los casos que ejercitan cada etapa:
+
+- Teléfono/Email repetidos con tasas configurables (con variaciones de
+  espacios y mayúsculas que la dedup normaliza).
+- País en estilo "País: xx", con acentos, sin acentos/mayúsculas cambiadas
+  (casan tras normalizar) y países desconocidos.
+- campaign_fullcode presente y ausente en el maestro de modalidad, y vacío.
+- Productos "NON" (descartados) y códigos de producto sin mapeo.
+- Algunos Submission ID no numéricos.
+
+Uso:
+    python bench/generador.py 1000000 -o export_1M.csv --semilla 7
+"""
+import argparse
+import sys
+from dataclasses import dataclass, asdict
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import maestros
+from ficheros import escritura_atomica
+from pipeline import COLUMNAS_NECESARIAS, MAP_PRODUCTO
+
+FILAS_BLOQUE = 500_000
+ID_INICIAL = 100_000
+
+PAISES_RESPALDO = ["España", "México", "Colombia", "Perú", "Chile", "Argentina", "Reino Unido", "Francia"]
+PAISES_DESCONOCIDOS = ["Narnia", "Atlántida", "Wakanda", "Freedonia"]
+MODALIDADES_RESPALDO = [f"ARTIKAINES{c}WEBLANEUMET{i:03d}" for c in MAP_PRODUCTO for i in range(5)]
+PRODUCTOS_NON = ["NON", "NON - Sin interés", "non contactar"]
+PRODUCTOS_SIN_MAPEO = ["ZZ", "XX1"]
+NOMBRES = ["Ana", "José", "María", "Íñigo", "Lucía", "Juan Carlos", "Begoña", "Ramón", "Núria", "Pedro"]
+APELLIDOS = ["López García", "Muñoz", "Pérez Sánchez", "Ibáñez", "Gómez", "Fernández Ruiz", "Núñez", ""]
+DOMINIOS = ["gmail.com", "hotmail.es", "yahoo.es", "artikabooks.com"]
+
+@dataclass(frozen=True)
+class ParametrosGenerador:
+    filas: int
+    semilla: int = 42
+    tasa_dup_telefono: float = 0.08
+    tasa_dup_email: float = 0.10
+    tasa_non: float = 0.05
+    tasa_pais_desconocido: float = 0.04
+    tasa_pais_variante: float = 0.20
+    tasa_modalidad_ausente: float = 0.15
+    tasa_modalidad_vacia: float = 0.02
+    tasa_id_no_numerico: float = 0.001
+
+    def nombre_fichero(self) -> str:
+        """Nombre estable por parámetros (sirve de clave de caché del dataset)."""
+        valores = "_".join(f"{v}" for v in asdict(self).values())
+        return f"export_{valores}.csv"
+
+def _elegir(rng: np.random.Generator, opciones, n: int) -> np.ndarray:
+    return np.asarray(opciones, dtype=object)[rng.integers(0, len(opciones), n)]
+
+def _origen_repetido(rng: np.random.Generator, posiciones: np.ndarray, tasa: float) -> np.ndarray:
+    """Para cada fila, el índice de la 'persona' que usa: la suya o una anterior (duplicado)."""
+    repetida = (rng.random(len(posiciones)) < tasa) & (posiciones > 0)
+    anterior = (rng.random(len(posiciones)) * posiciones).astype(np.int64)
+    return np.where(repetida, anterior, posiciones)
+
+def _variantes_pais(paises: np.ndarray, rng: np.random.Generator, tasa: float) -> np.ndarray:
+    """Sin acentos, en mayúsculas o con espacios: deben casar tras normalizar."""
+    s = pd.Series(paises, dtype=object)
+    cambia = rng.random(len(s)) < tasa
+    tipo = rng.integers(0, 3, len(s))
+    sin_acentos = s.str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+    s = s.mask(cambia & (tipo == 0), sin_acentos)
+    s = s.mask(cambia & (tipo == 1), s.str.upper())
+    s = s.mask(cambia & (tipo == 2), "  " + s + " ")
+    return s.to_numpy(dtype=object)
+
+def generar_bloque(p: ParametrosGenerador, inicio: int, n: int, paises: list[str],
+                   modalidades: list[str]) -> pd.DataFrame:
+    """Filas [inicio, inicio + n) del export; cada bloque tiene su propia semilla derivada."""
+    rng = np.random.default_rng([p.semilla, inicio])
+    pos = np.arange(inicio, inicio + n, dtype=np.int64)
+
+    ids = pd.Series(pos + ID_INICIAL).astype(str)
+    ids = ids.mask(rng.random(n) < p.tasa_id_no_numerico, "pendiente")
+    segundos = pd.to_timedelta(pos * 37, unit="s")
+    creado = (pd.Timestamp("2025-01-01") + segundos).strftime("%Y-%m-%d %H:%M:%S")
+
+    persona_tel = _origen_repetido(rng, pos, p.tasa_dup_telefono)
+    persona_mail = _origen_repetido(rng, pos, p.tasa_dup_email)
+    digitos = pd.Series(persona_tel % 100_000_000).astype(str).str.zfill(8)
+    telefono = "6" + digitos.str[:2] + " " + digitos.str[2:5] + " " + digitos.str[5:]
+    email = "lead" + pd.Series(persona_mail).astype(str) + "@" + _elegir(rng, DOMINIOS, n)
+    # La dedup normaliza espacios del teléfono y mayúsculas/espacios del email
+    telefono = telefono.mask(rng.random(n) < 0.1, telefono.str.replace(" ", "", regex=False))
+    email = email.mask(rng.random(n) < 0.1, email.str.upper() + " ")
+
+    nombre = pd.Series(_elegir(rng, NOMBRES, n)) + " " + _elegir(rng, APELLIDOS, n)
+
+    u = rng.random(n)
+    producto = _elegir(rng, list(MAP_PRODUCTO), n)
+    producto = np.where(u < p.tasa_non, _elegir(rng, PRODUCTOS_NON, n), producto)
+    producto = np.where((u >= p.tasa_non) & (u < p.tasa_non + 0.01), _elegir(rng, PRODUCTOS_SIN_MAPEO, n), producto)
+
+    u = rng.random(n)
+    pais = _variantes_pais(_elegir(rng, paises, n), rng, p.tasa_pais_variante)
+    pais = np.where(u < p.tasa_pais_desconocido, _elegir(rng, PAISES_DESCONOCIDOS, n), pais)
+    pais = pd.Series(pais, dtype=object)
+    # Estilo "País: xx" (el pipeline se queda con lo anterior a ':')
+    con_codigo = rng.random(n) < 0.5
+    pais = pais.mask(con_codigo, pais + ": " + pais.str.strip().str[:2].str.lower())
+
+    u = rng.random(n)
+    modalidad = _elegir(rng, modalidades, n)
+    ausente = "SINMAESTRO" + pd.Series(rng.integers(0, 500, n)).astype(str)
+    modalidad = np.where(u < p.tasa_modalidad_ausente, ausente, modalidad)
+    modalidad = np.where(u > 1 - p.tasa_modalidad_vacia, "", modalidad)
+
+    df = pd.DataFrame({
+        "Submission ID": ids,
+        "Created": creado,
+        "Nombre y Apellidos": nombre.str.strip(),
+        "Teléfono": telefono,
+        "Email": email,
+        "Guía": _elegir(rng, ["Sí", "No"], n),
+        "Artista": producto,
+        "gdpr_e": _elegir(rng, ["Yes", "No"], n),
+        "gdpr_g": _elegir(rng, ["Yes", "No"], n),
+        "campaign_fullcode": modalidad,
+        "País": pais,
+    })
+    # Columnas de más, como en el export real (la ingesta no las lee)
+    df["Form Name"] = "Guías Artika"
+    df["IP"] = "10.0." + pd.Series(pos % 250).astype(str) + ".1"
+    return df[COLUMNAS_NECESARIAS + ["Form Name", "IP"]]
+
+def valores_maestros(df_paises: pd.DataFrame | None = None,
+                     df_modalidad: pd.DataFrame | None = None) -> tuple[list[str], list[str]]:
+    """Países y códigos de campaña reales de los maestros (o los de respaldo si faltan)."""
+    paises = PAISES_RESPALDO
+    if maestros.maestro_paises_valido(df_paises):
+        paises = df_paises["País"].dropna().astype(str).tolist() or PAISES_RESPALDO
+    modalidades = MODALIDADES_RESPALDO
+    if maestros.maestro_modalidad_valido(df_modalidad):
+        modalidades = df_modalidad["modalidad"].dropna().astype(str).tolist() or MODALIDADES_RESPALDO
+    return paises, modalidades
+
+def generar_csv(destino: str | Path, p: ParametrosGenerador,
+                paises: list[str] | None = None, modalidades: list[str] | None = None) -> Path:
+    """Escribe el export sintético en `destino` por bloques de FILAS_BLOQUE filas."""
+    if paises is None or modalidades is None:
+        por_defecto = valores_maestros(maestros.cargar_maestro_paises()[0],
+                                       maestros.cargar_maestro_modalidad()[0])
+        paises = paises or por_defecto[0]
+        modalidades = modalidades or por_defecto[1]
+    destino = Path(destino)
+    with escritura_atomica(destino) as tmp, open(tmp, "w", encoding="utf-8", newline="") as f:
+        for inicio in range(0, p.filas, FILAS_BLOQUE):
+            bloque = generar_bloque(p, inicio, min(FILAS_BLOQUE, p.filas - inicio), paises, modalidades)
+            bloque.to_csv(f, index=False, header=inicio == 0)
+    return destino
+
+def construir_parser() -> argparse.ArgumentParser:
+    a = argparse.ArgumentParser(description="Genera un export CSV sintético con el esquema real.")
+    a.add_argument("filas", type=int)
+    a.add_argument("-o", "--salida", type=Path, required=True)
+    a.add_argument("--semilla", type=int, default=ParametrosGenerador.semilla)
+    a.add_argument("--dup-telefono", type=float, default=ParametrosGenerador.tasa_dup_telefono)
+    a.add_argument("--dup-email", type=float, default=ParametrosGenerador.tasa_dup_email)
+    a.add_argument("--non", type=float, default=ParametrosGenerador.tasa_non)
+    a.add_argument("--pais-desconocido", type=float, default=ParametrosGenerador.tasa_pais_desconocido)
+    a.add_argument("--modalidad-ausente", type=float, default=ParametrosGenerador.tasa_modalidad_ausente)
+    return a
+
+def main(argv: list[str] | None = None) -> int:
+    args = construir_parser().parse_args(argv)
+    p = ParametrosGenerador(
+        filas=args.filas, semilla=args.semilla,
+        tasa_dup_telefono=args.dup_telefono, tasa_dup_email=args.dup_email,
+        tasa_non=args.non, tasa_pais_desconocido=args.pais_desconocido,
+        tasa_modalidad_ausente=args.modalidad_ausente,
+    )
+    print(generar_csv(args.salida, p))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Caché por etapas para la app: cada etapa (lectura, transformación,
+exportación) guarda sus resultados en una LRU acotada, con claves que
+incluyen solo las entradas de esa etapa. Así, un rerun de Streamlit que no
+cambia nada relevante reutiliza los resultados en lugar de recalcularlos.
+"""
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+def huella_bytes(datos) -> str:
+    """sha1 del contenido (bytes o memoryview, sin copiarlo)."""
+    return hashlib.sha1(datos).hexdigest()
+
+class CacheLRU:
+    """
+    Diccionario LRU de tamaño máximo `max_entradas`. `al_expulsar(valor)` se
+    llama con cada valor descartado (p. ej. para borrar un fichero temporal).
+    """
+    def __init__(self, max_entradas: int, al_expulsar: Callable[[Any], None] | None = None):
+        self.max_entradas = max_entradas
+        self.al_expulsar = al_expulsar
+        self._datos: OrderedDict[Hashable, Any] = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def __contains__(self, clave: Hashable) -> bool:
+        return clave in self._datos
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+    def obtener(self, clave: Hashable) -> Any:
+        self._datos.move_to_end(clave)
+        return self._datos[clave]
+
+    def guardar(self, clave: Hashable, valor: Any) -> None:
+        self._datos[clave] = valor
+        self._datos.move_to_end(clave)
+        while len(self._datos) > self.max_entradas:
+            _, expulsado = self._datos.popitem(last=False)
+            if self.al_expulsar is not None:
+                self.al_expulsar(expulsado)
+
+    def obtener_o_calcular(self, clave: Hashable, calcular: Callable[[], Any]) -> Any:
+        if clave in self._datos:
+            self.aciertos += 1
+            return self.obtener(clave)
+        self.fallos += 1
+        valor = calcular()
+        self.guardar(clave, valor)
+        return valor
+
+    def limpiar(self) -> None:
+        while self._datos:
+            _, valor = self._datos.popitem(last=False)
+            if self.al_expulsar is not None:
+                self.al_expulsar(valor)
@@ -0,0 +1,125 @@
+"""
+Entrada por línea de comandos del pipeline (sin Streamlit).
+
+Ejemplo:
+    python cli.py export.csv -o salida.xlsx --sep ";" --desde-id 12000 --informe informe.json
+    python cli.py exports/ -o salida.parquet --procesos 8 --estadisticas por_fichero.csv
+    python cli.py export.csv -o salida.parquet --perfil --tracemalloc --cprofile perfil.pstats
+    python cli.py export.csv -o salida.xlsx --aproximado --aceptar-aproximado 0.9
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from maestros import (cargar_maestro_paises, cargar_maestro_modalidad,
+                      maestro_paises_valido, maestro_modalidad_valido)
+from pipeline import procesar_csv, CHUNKSIZE_POR_DEFECTO
+from dedup import IndiceDedup
+from estado import EstadoIncremental
+from escritores import FORMATOS
+from perfilado import Perfilador
+from aproximado import CruceAproximado, TablaAlias, UMBRAL_SUGERENCIA
+
+def construir_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Transforma un export CSV de formularios en streaming (XLSX, CSV.gz, Parquet o NDJSON).")
+    p.add_argument("entrada", type=Path, nargs="+",
+                   help="CSV de entrada; con varios ficheros o un directorio se procesa en lote y en paralelo")
+    p.add_argument("-o", "--salida", type=Path, required=True, help="Fichero de salida")
+    p.add_argument("--formato", choices=sorted(FORMATOS), help="Formato de salida (por defecto, según la extensión: .xlsx, .csv.gz, .parquet, .ndjson)")
+    p.add_argument("--sep", default=None, help="Separador del CSV de entrada (por defecto, autodetección)")
+    p.add_argument("--encoding", default=None, help="Codificación del CSV de entrada (por defecto, autodetección)")
+    p.add_argument("--chunksize", type=int, default=CHUNKSIZE_POR_DEFECTO, help="Filas por chunk (modo de un solo fichero)")
+    p.add_argument("--procesos", type=int, default=None, help="Procesos en modo lote (por defecto, todos los núcleos)")
+    p.add_argument("--estadisticas", type=Path, default=None, help="En modo lote, guarda la tabla por fichero en CSV")
+    p.add_argument("--desde-id", type=int, default=None, help="Procesar desde este Submission ID (inclusivo)")
+    p.add_argument("--paises", type=Path, default=None, help="Ruta al maestro de países (por defecto, búsqueda habitual)")
+    p.add_argument("--modalidad", type=Path, default=None, help="Ruta al maestro de modalidad (por defecto, búsqueda habitual)")
+    p.add_argument("--url-modalidad", default=None, help="URL RAW del maestro de modalidad")
+    p.add_argument("--estado", type=Path, default=None,
+                   help="Directorio de estado incremental: omite IDs ya procesados (marca de agua) y aplica su índice de dedup")
+    p.add_argument("--dedup-estado", type=Path, default=None,
+                   help="Índice de dedup (.npz) a cargar y actualizar: descarta leads ya entregados en ejecuciones previas")
+    p.add_argument("--informe", type=Path, default=None, help="Guarda el informe de diagnóstico en JSON")
+    p.add_argument("--perfil", action="store_true", help="Añade al informe JSON el tiempo, filas y memoria de cada etapa")
+    p.add_argument("--tracemalloc", action="store_true", help="Con --perfil, mide el pico de memoria Python por etapa (más lento)")
+    p.add_argument("--cprofile", type=Path, default=None, help="Guarda un perfil cProfile (pstats) de las etapas en esta ruta")
+    p.add_argument("--aproximado", action="store_true",
+                   help="Sugiere correspondencias aproximadas para países/modalidades sin coincidencia exacta")
+    p.add_argument("--umbral-aproximado", type=float, default=UMBRAL_SUGERENCIA,
+                   help="Confianza mínima (0-1) para sugerir una correspondencia aproximada")
+    p.add_argument("--aceptar-aproximado", type=float, default=None, metavar="CONF",
+                   help="Acepta y guarda como alias las sugerencias con confianza >= CONF (0-1)")
+    p.add_argument("--alias", type=Path, default=None,
+                   help="Fichero JSON de alias aprendidos (por defecto, alias_maestros.json junto a la app)")
+    return p
+
+def main(argv: list[str] | None = None) -> int:
+    args = construir_parser().parse_args(argv)
+
+    df_paises, origen_paises, *_ = cargar_maestro_paises(args.paises)
+    if not maestro_paises_valido(df_paises):
+        print("⚠️ Maestro de países no encontrado o no válido; se omite el cruce.", file=sys.stderr)
+        df_paises = None
+    df_modalidad, origen_modalidad, rutas_modalidad, *_ = cargar_maestro_modalidad(args.url_modalidad, ruta=args.modalidad)
+    if rutas_modalidad and rutas_modalidad[0].startswith("(URL no disponible"):
+        print(f"⚠️ {rutas_modalidad[0].strip('()')}.", file=sys.stderr)
+    if not maestro_modalidad_valido(df_modalidad):
+        print("⚠️ Maestro de modalidad no encontrado o no válido; se omite el cruce.", file=sys.stderr)
+        df_modalidad = None
+
+    estado = EstadoIncremental.cargar(args.estado) if args.estado else None
+    if estado is not None:
+        dedup = estado.cargar_dedup()
+    else:
+        dedup = IndiceDedup.cargar(args.dedup_estado) if args.dedup_estado else IndiceDedup()
+    perfil = Perfilador(activo=args.perfil or args.cprofile is not None,
+                        tracemalloc=args.tracemalloc, cprofile=args.cprofile is not None)
+    alias = TablaAlias.cargar(args.alias)
+    cruce = CruceAproximado(alias, sugerir=args.aproximado, umbral=args.umbral_aproximado,
+                            aceptar_desde=args.aceptar_aproximado)
+    comunes = dict(
+        formato=args.formato, sep=args.sep, encoding=args.encoding,
+        start_id_value=args.desde_id, marca_agua=estado.ultimo_id if estado else None,
+        df_paises=df_paises, df_modalidad=df_modalidad, dedup=dedup, perfil=perfil, cruce=cruce,
+    )
+    estadisticas = None
+    if len(args.entrada) == 1 and not args.entrada[0].is_dir():
+        informe = procesar_csv(args.entrada[0], args.salida, chunksize=args.chunksize, **comunes)
+    else:
+        from lotes import procesar_lote  # multiproceso: solo en modo lote
+
+        resultado = procesar_lote(args.entrada, args.salida, procesos=args.procesos, **comunes)
+        informe, estadisticas = resultado.informe, resultado.estadisticas
+        if args.estadisticas:
+            estadisticas.to_csv(args.estadisticas, index=False)
+    if estado is not None:
+        estado.guardar(dedup, informe.id_maximo)
+    elif args.dedup_estado:
+        dedup.guardar(args.dedup_estado)
+    nuevos = (alias.agregar_aceptadas("paises", informe.paises_sugerencias)
+              + alias.agregar_aceptadas("modalidad", informe.modalidad_sugerencias))
+    if nuevos:
+        alias.guardar()
+        print(f"[info] {nuevos} alias nuevos guardados en {alias.ruta}", file=sys.stderr)
+
+    for nivel, texto in informe.mensajes():
+        print(f"[{nivel}] {texto}", file=sys.stderr)
+    datos = informe.to_dict()
+    datos["maestro_paises"] = origen_paises if df_paises is not None else None
+    datos["maestro_modalidad"] = origen_modalidad if df_modalidad is not None else None
+    if estadisticas is not None:
+        datos["ficheros"] = estadisticas.to_dict(orient="records")
+    if args.perfil:
+        datos["perfil"] = perfil.to_dict()
+    if args.cprofile is not None:
+        perfil.volcar_cprofile(args.cprofile)
+    texto = json.dumps(datos, ensure_ascii=False, indent=2)
+    if args.informe:
+        args.informe.write_text(texto, encoding="utf-8")
+    else:
+        print(texto)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
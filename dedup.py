@@ -0,0 +1,121 @@
+"""
+Índice de deduplicación exacta por `telefono_norm` / `email_norm` entre
+chunks y entre ejecuciones.
+
+Las claves se guardan como huellas de 64 bits (hash estable de pandas) en
+arrays NumPy ordenados, así que cada clave ocupa 8 bytes y se puede
+persistir en un .npz para que la siguiente ejecución descarte los leads
+ya entregados sin releer ficheros antiguos. Con 64 bits, la probabilidad
+de colisión es despreciable para decenas de millones de claves.
+
+Las claves vacías (teléfono o email que faltan, "" o "nan" tras normalizar)
+se deduplican dentro de una ejecución como en drop_duplicates, pero no se
+persisten: un lead sin teléfono de otro día no es un duplicado.
+"""
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from ficheros import escritura_atomica
+from normalizacion import TEXTO_NULO
+
+COMPACTAR_MIN_PENDIENTES = 65_536
+
+def huellas(s: pd.Series) -> np.ndarray:
+    """Huella uint64 estable de cada valor (los nulos comparten huella, como en drop_duplicates)."""
+    valores = np.asarray(s.fillna("").astype(str).astype(object))
+    # Claves casi todas distintas: categorizar antes no ahorra nada (mismo hash)
+    return pd.util.hash_array(valores, categorize=False)
+
+# Huellas de las claves que representan un valor ausente
+HUELLAS_VACIAS = huellas(pd.Series(["", TEXTO_NULO]))
+
+def _sin_vacias(h: np.ndarray) -> np.ndarray:
+    return h[~np.isin(h, HUELLAS_VACIAS)]
+
+def _en_ordenado(ordenado: np.ndarray, h: np.ndarray) -> np.ndarray:
+    if len(ordenado) == 0:
+        return np.zeros(len(h), dtype=bool)
+    idx = np.searchsorted(ordenado, h)
+    idx[idx == len(ordenado)] = 0
+    return ordenado[idx] == h
+
+class ConjuntoHuellas:
+    """
+    Conjunto de huellas uint64: un array ordenado (búsqueda binaria) más
+    lotes pendientes que se fusionan cuando crecen, para no reordenar en cada chunk.
+    """
+    def __init__(self, huellas_iniciales: np.ndarray | None = None):
+        if huellas_iniciales is None:
+            huellas_iniciales = np.empty(0, dtype=np.uint64)
+        self._ordenadas = np.unique(huellas_iniciales.astype(np.uint64, copy=False))
+        self._pendientes: list[np.ndarray] = []
+        self._n_pendientes = 0
+
+    def __len__(self) -> int:
+        return len(self._ordenadas) + self._n_pendientes
+
+    def contiene(self, h: np.ndarray) -> np.ndarray:
+        res = _en_ordenado(self._ordenadas, h)
+        if self._pendientes:
+            res |= np.isin(h, np.concatenate(self._pendientes))
+        return res
+
+    def agregar(self, h: np.ndarray) -> None:
+        """Añade huellas nuevas (se asume que no están ya en el conjunto)."""
+        if len(h) == 0:
+            return
+        self._pendientes.append(h.astype(np.uint64, copy=False))
+        self._n_pendientes += len(h)
+        if self._n_pendientes >= max(COMPACTAR_MIN_PENDIENTES, len(self._ordenadas) // 8):
+            self.compactar()
+
+    def compactar(self) -> None:
+        if self._pendientes:
+            # Los pendientes nunca están ya en el conjunto: basta concatenar y ordenar
+            self._ordenadas = np.sort(np.concatenate([self._ordenadas, *self._pendientes]))
+            self._pendientes = []
+            self._n_pendientes = 0
+
+    def array(self) -> np.ndarray:
+        self.compactar()
+        return self._ordenadas
+
+class IndiceDedup:
+    """
+    Deduplicación 'keep first' equivalente a drop_duplicates por teléfono
+    sobre todas las filas y, después, por email sobre las supervivientes;
+    el estado se conserva entre chunks y, con guardar()/cargar(), entre ejecuciones.
+    """
+    def __init__(self, telefonos: np.ndarray | None = None, emails: np.ndarray | None = None):
+        self.telefonos = ConjuntoHuellas(telefonos)
+        self.emails = ConjuntoHuellas(emails)
+
+    def filtrar(self, telefono_norm: pd.Series, email_norm: pd.Series) -> pd.Series:
+        """Máscara booleana (alineada con el índice de entrada) de las filas a conservar."""
+        h_tel = huellas(telefono_norm)
+        mask = ~pd.Series(h_tel).duplicated(keep="first").to_numpy() & ~self.telefonos.contiene(h_tel)
+        self.telefonos.agregar(h_tel[mask])
+
+        h_em = huellas(email_norm)[mask]
+        mask_em = ~pd.Series(h_em).duplicated(keep="first").to_numpy() & ~self.emails.contiene(h_em)
+        self.emails.agregar(h_em[mask_em])
+        mask[mask] = mask_em
+        return pd.Series(mask, index=telefono_norm.index)
+
+    def guardar(self, ruta: str | Path) -> None:
+        """Persiste las huellas en un .npz (escritura atómica), sin las claves vacías."""
+        with escritura_atomica(ruta) as tmp, open(tmp, "wb") as f:
+            np.savez(f, telefonos=_sin_vacias(self.telefonos.array()), emails=_sin_vacias(self.emails.array()))
+
+    @classmethod
+    def cargar(cls, ruta: str | Path) -> "IndiceDedup":
+        """
+        Carga el índice desde `ruta`; si no existe, devuelve uno vacío. Se
+        descartan las claves vacías que pudiera tener un índice guardado antes.
+        """
+        ruta = Path(ruta)
+        if not ruta.exists():
+            return cls()
+        with np.load(ruta) as datos:
+            return cls(_sin_vacias(datos["telefonos"]), _sin_vacias(datos["emails"]))
@@ -0,0 +1,257 @@
+"""
+Escritores de salida en streaming: reciben el resultado del pipeline chunk a
+chunk y lo vuelcan a disco sin acumular el DataFrame completo en memoria.
+
+Todos añaden al final las columnas constantes que falten (`columnas_fijas`,
+por defecto las COLUMNAS_FIJAS del pipeline, que no las materializa) y leen
+las categóricas por código, sin convertirlas antes a cadenas por fila.
+"""
+import gzip
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from pipeline import COLUMNAS_CATEGORICAS, con_columnas_fijas
+
+ANCHO_MAX_COLUMNA = 50
+FILAS_MUESTRA_ANCHO = 100
+FILAS_BLOQUE = 50_000
+MAX_FILAS_EXCEL = 1_048_576  # límite de filas por hoja de Excel (cabecera incluida)
+
+def _anchos_columnas(df: pd.DataFrame) -> list[int]:
+    """Ancho por columna estimado con una muestra acotada, sin convertir columnas enteras."""
+    anchos = []
+    for col in df.columns:
+        sample = df[col].iloc[:FILAS_MUESTRA_ANCHO].tolist()
+        max_len = max([len(str(col))] + [len(str(s)) for s in sample]) + 2
+        anchos.append(min(max_len, ANCHO_MAX_COLUMNA))
+    return anchos
+
+def _valores_columna(s: pd.Series) -> np.ndarray:
+    """Valores nativos (nulos → None); en las categóricas, referencias a sus categorías."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        categorias = np.append(s.cat.categories.to_numpy(dtype=object), None)  # el código -1 apunta a None
+        return categorias[s.cat.codes.to_numpy()]
+    return s.to_numpy(dtype=object, na_value=None)
+
+def _filas(df: pd.DataFrame):
+    """Tuplas de valores nativos (nulos → None) por bloques de FILAS_BLOQUE filas."""
+    for ini in range(0, len(df), FILAS_BLOQUE):
+        bloque = df.iloc[ini:ini + FILAS_BLOQUE]
+        yield from zip(*(_valores_columna(bloque[c]) for c in bloque.columns))
+
+class EscritorXlsx:
+    """
+    XLSX fila a fila y en memoria constante: xlsxwriter en modo constant_memory
+    o, si no está instalado, openpyxl en modo write-only.
+    Los anchos se estiman con el primer chunk y, al superar el límite de filas
+    de Excel, se continúa en una hoja nueva ('datos', 'datos_2', ...).
+    """
+    extension = ".xlsx"
+    mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+    def __init__(self, destino: str | Path, sheet_name: str = "datos", max_filas_hoja: int = MAX_FILAS_EXCEL,
+                 columnas_fijas: dict[str, str] | None = None):
+        self.destino = Path(destino)
+        self.columnas_fijas = columnas_fijas
+        self.sheet_name = sheet_name
+        self.max_filas_hoja = max_filas_hoja
+        self.hojas: list[str] = []
+        self._wb = None
+        self._ws = None
+        self._xlsxwriter = False
+        self._columnas: list[str] | None = None
+        self._anchos: list[int] = []
+        self._fila = 0
+
+    def __enter__(self):
+        try:
+            import xlsxwriter  # type: ignore
+            self._wb = xlsxwriter.Workbook(str(self.destino), {
+                "constant_memory": True,
+                "default_date_format": "yyyy-mm-dd hh:mm:ss",
+            })
+            self._xlsxwriter = True
+        except ImportError:
+            from openpyxl import Workbook  # type: ignore
+            self._wb = Workbook(write_only=True)
+        return self
+
+    def _nueva_hoja(self) -> None:
+        nombre = self.sheet_name if not self.hojas else f"{self.sheet_name}_{len(self.hojas) + 1}"
+        self.hojas.append(nombre)
+        if self._xlsxwriter:
+            self._ws = self._wb.add_worksheet(nombre)
+            for i, ancho in enumerate(self._anchos):
+                self._ws.set_column(i, i, ancho)
+        else:
+            from openpyxl.utils import get_column_letter  # type: ignore
+            self._ws = self._wb.create_sheet(nombre)
+            for i, ancho in enumerate(self._anchos, start=1):
+                self._ws.column_dimensions[get_column_letter(i)].width = ancho
+        self._fila = 0
+        if self._columnas:
+            self._escribir_fila(self._columnas)
+
+    def _escribir_fila(self, fila) -> None:
+        if self._xlsxwriter:
+            self._ws.write_row(self._fila, 0, fila)
+        else:
+            self._ws.append(fila)
+        self._fila += 1
+
+    def escribir(self, df: pd.DataFrame) -> None:
+        df = con_columnas_fijas(df, self.columnas_fijas)
+        if self._columnas is None:
+            self._columnas = [str(c) for c in df.columns]
+            self._anchos = _anchos_columnas(df)
+            self._nueva_hoja()
+        for fila in _filas(df):
+            if self._fila >= self.max_filas_hoja:
+                self._nueva_hoja()
+            self._escribir_fila(fila)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._ws is None:
+            self._nueva_hoja()  # un libro sin hojas no es válido
+        if self._xlsxwriter:
+            self._wb.close()
+        elif exc_type is None:
+            self._wb.save(self.destino)
+        self._wb = self._ws = None
+        return False
+
+class EscritorParquet:
+    """
+    Parquet con pyarrow, un row group por chunk.
+    Todo se escribe como texto para mantener un esquema estable entre chunks;
+    las columnas de `columnas_diccionario` van como dictionary<int32, string>.
+    """
+    extension = ".parquet"
+    mime = "application/vnd.apache.parquet"
+
+    def __init__(self, destino: str | Path, columnas_diccionario: list[str] | None = None,
+                 columnas_fijas: dict[str, str] | None = None):
+        self.destino = Path(destino)
+        self.columnas_fijas = columnas_fijas
+        self.columnas_diccionario = set(COLUMNAS_CATEGORICAS if columnas_diccionario is None else columnas_diccionario)
+        self._writer = None
+        self._schema = None
+
+    def __enter__(self):
+        return self
+
+    def _columna(self, s: pd.Series, tipo):
+        import pyarrow as pa  # type: ignore
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            # Códigos y categorías tal cual: sin pasar por una cadena por fila
+            codigos = s.cat.codes.to_numpy()
+            indices = pa.array(codigos.astype(np.int32), mask=codigos < 0)
+            categorias = pa.array(s.cat.categories.astype(str).to_numpy(dtype=object), type=pa.string())
+            arr = pa.DictionaryArray.from_arrays(indices, categorias)
+            return arr if pa.types.is_dictionary(tipo) else arr.dictionary_decode()
+        arr = pa.array(s.astype("string"), type=pa.string(), from_pandas=True)
+        return arr.dictionary_encode() if pa.types.is_dictionary(tipo) else arr
+
+    def escribir(self, df: pd.DataFrame) -> None:
+        import pyarrow as pa  # type: ignore
+        import pyarrow.parquet as pq  # type: ignore
+
+        df = con_columnas_fijas(df, self.columnas_fijas)
+        if self._schema is None:
+            self._schema = pa.schema([
+                (str(c), pa.dictionary(pa.int32(), pa.string()) if c in self.columnas_diccionario else pa.string())
+                for c in df.columns
+            ])
+            self._writer = pq.ParquetWriter(self.destino, self._schema)
+        columnas = [self._columna(df[c], campo.type) for c, campo in zip(df.columns, self._schema)]
+        self._writer.write_table(pa.Table.from_arrays(columnas, schema=self._schema))
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._writer is not None:
+            self._writer.close()
+        self._writer = None
+        return False
+
+class EscritorCsvGz:
+    """CSV comprimido con gzip; la cabecera se escribe con el primer chunk."""
+    extension = ".csv.gz"
+    mime = "application/gzip"
+
+    def __init__(self, destino: str | Path, sep: str = ",", nivel_compresion: int = 6,
+                 columnas_fijas: dict[str, str] | None = None):
+        self.destino = Path(destino)
+        self.columnas_fijas = columnas_fijas
+        self.sep = sep
+        self.nivel_compresion = nivel_compresion
+        self._f = None
+        self._cabecera = False
+
+    def __enter__(self):
+        self._f = gzip.open(self.destino, "wt", encoding="utf-8", newline="", compresslevel=self.nivel_compresion)
+        return self
+
+    def escribir(self, df: pd.DataFrame) -> None:
+        df = con_columnas_fijas(df, self.columnas_fijas)
+        df.to_csv(self._f, sep=self.sep, index=False, header=not self._cabecera)
+        self._cabecera = True
+
+    def __exit__(self, exc_type, exc, tb):
+        self._f.close()
+        self._f = None
+        return False
+
+class EscritorNdjson:
+    """JSON por líneas (un objeto por registro), apto para cargas incrementales."""
+    extension = ".ndjson"
+    mime = "application/x-ndjson"
+
+    def __init__(self, destino: str | Path, columnas_fijas: dict[str, str] | None = None):
+        self.destino = Path(destino)
+        self.columnas_fijas = columnas_fijas
+        self._f = None
+
+    def __enter__(self):
+        self._f = open(self.destino, "w", encoding="utf-8", newline="\n")
+        return self
+
+    def escribir(self, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+        df = con_columnas_fijas(df, self.columnas_fijas)
+        texto = df.to_json(orient="records", lines=True, force_ascii=False, date_format="iso")
+        self._f.write(texto if texto.endswith("\n") else texto + "\n")
+
+    def __exit__(self, exc_type, exc, tb):
+        self._f.close()
+        self._f = None
+        return False
+
+FORMATOS = {
+    "xlsx": EscritorXlsx,
+    "csv.gz": EscritorCsvGz,
+    "parquet": EscritorParquet,
+    "ndjson": EscritorNdjson,
+}
+
+def formato_por_extension(destino: str | Path) -> str:
+    nombre = Path(destino).name.lower()
+    for formato, escritor in FORMATOS.items():
+        if nombre.endswith(escritor.extension):
+            return formato
+    if nombre.endswith(".jsonl"):
+        return "ndjson"
+    return Path(destino).suffix.lstrip(".").lower()
+
+def abrir_escritor(destino: str | Path, formato: str | None = None, **opciones):
+    """Devuelve el escritor para `formato` (o el deducido de la extensión de `destino`)."""
+    formato = (formato or formato_por_extension(destino)).lower()
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de salida no soportado: '{formato}'. Opciones: {sorted(FORMATOS)}")
+    return FORMATOS[formato](destino, **opciones)
+
+def exportar_dataframe(df: pd.DataFrame, destino: str | Path, formato: str | None = None, **opciones) -> Path:
+    """Escribe un DataFrame completo con el escritor en streaming correspondiente."""
+    with abrir_escritor(destino, formato, **opciones) as escritor:
+        escritor.escribir(df)
+    return Path(destino)
@@ -0,0 +1,50 @@
+"""
+Estado incremental del pipeline: marca de agua (último `id_integrador`
+procesado) e índice de deduplicación, guardados en un directorio local.
+
+    <directorio>/estado.json   {"ultimo_id": 12345}
+    <directorio>/dedup.npz     huellas de teléfono/email (ver dedup.py)
+
+El JSON se escribe después del índice, de modo que la marca de agua solo
+avanza cuando todo lo demás se ha persistido.
+"""
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+from dedup import IndiceDedup
+from ficheros import escribir_atomico
+
+FICHERO_ESTADO = "estado.json"
+FICHERO_DEDUP = "dedup.npz"
+
+@dataclass
+class EstadoIncremental:
+    directorio: Path
+    ultimo_id: int | None = None
+
+    @property
+    def ruta_dedup(self) -> Path:
+        return self.directorio / FICHERO_DEDUP
+
+    @classmethod
+    def cargar(cls, directorio: str | Path) -> "EstadoIncremental":
+        """Lee el estado de `directorio`; si no existe, empieza sin marca de agua."""
+        directorio = Path(directorio)
+        ruta = directorio / FICHERO_ESTADO
+        ultimo_id = None
+        if ruta.exists():
+            ultimo_id = json.loads(ruta.read_text(encoding="utf-8")).get("ultimo_id")
+        return cls(directorio, ultimo_id)
+
+    def cargar_dedup(self) -> IndiceDedup:
+        return IndiceDedup.cargar(self.ruta_dedup)
+
+    def guardar(self, dedup: IndiceDedup | None, id_maximo: int | None) -> None:
+        """Persiste el índice y avanza la marca de agua hasta `id_maximo` (nunca retrocede)."""
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        if dedup is not None:
+            dedup.guardar(self.ruta_dedup)
+        if id_maximo is not None:
+            self.ultimo_id = int(id_maximo) if self.ultimo_id is None else max(self.ultimo_id, int(id_maximo))
+        escribir_atomico(self.directorio / FICHERO_ESTADO, json.dumps({"ultimo_id": self.ultimo_id}))
@@ -0,0 +1,30 @@
+"""
+Escritura atómica de ficheros: se escribe en un temporal junto al destino y
+se sustituye con os.replace, así un lector (u otra ejecución) nunca ve un
+fichero a medias. Si la escritura falla, el temporal se borra y el destino
+queda como estaba.
+"""
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+@contextmanager
+def escritura_atomica(ruta: str | Path) -> Iterator[Path]:
+    """Da la ruta temporal en la que escribir; al salir sin error sustituye a `ruta`."""
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    tmp = ruta.with_name(ruta.name + ".tmp")
+    try:
+        yield tmp
+        os.replace(tmp, ruta)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+def escribir_atomico(ruta: str | Path, datos: bytes | str) -> None:
+    """Escribe `datos` (texto en UTF-8) en `ruta` de forma atómica."""
+    with escritura_atomica(ruta) as tmp:
+        if isinstance(datos, str):
+            tmp.write_text(datos, encoding="utf-8")
+        else:
+            tmp.write_bytes(datos)
@@ -0,0 +1,147 @@
+"""
+Ingesta tipada y de poca memoria del CSV exportado de formularios.
+
+- Solo se leen las columnas de COLUMNAS_NECESARIAS (`usecols`).
+- Tipos explícitos: Submission ID como entero nullable, códigos de baja
+  cardinalidad como category y el resto como string[pyarrow].
+- Separador y codificación se detectan con una muestra de los primeros bytes.
+- El fichero completo se lee con pyarrow.csv declarando todas las
+  columnas como texto (sin inferencia: se conservan ceros a la izquierda,
+  fechas y códigos tal cual) y los mismos nulos que el motor C, de modo que
+  el resultado es idéntico al de la lectura por chunks con el motor C.
+"""
+import csv
+import io
+from dataclasses import dataclass
+from pathlib import Path
+import pandas as pd
+
+from pipeline import COLUMNAS_NECESARIAS
+
+BYTES_MUESTRA = 64 * 1024
+SEPARADORES = [",", ";", "\t", "|"]
+BOM_UTF8 = b"\xef\xbb\xbf"
+CODIFICACION_RESPALDO = "latin-1"
+
+COLUMNA_ID = "Submission ID"
+# Valores leídos como nulo: la lista por defecto del motor C de pandas. Se pasa
+# explícitamente a los dos motores para que no dependan de esa lista interna
+VALORES_NULOS = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+COLUMNAS_CATEGORIA = ["País", "Artista", "Guía", "gdpr_e", "gdpr_g", "campaign_fullcode"]
+
+TIPO_TEXTO = "string[pyarrow]"
+
+@dataclass(frozen=True)
+class FormatoCsv:
+    sep: str
+    encoding: str
+    columnas: list[str]
+
+    @property
+    def usecols(self) -> list[str]:
+        return [c for c in COLUMNAS_NECESARIAS if c in self.columnas]
+
+    @property
+    def faltan(self) -> list[str]:
+        return [c for c in COLUMNAS_NECESARIAS if c not in self.columnas]
+
+def _leer_muestra(origen) -> bytes:
+    """Primeros bytes del origen (ruta o buffer binario); el buffer se rebobina."""
+    if isinstance(origen, (str, Path)):
+        with open(origen, "rb") as f:
+            return f.read(BYTES_MUESTRA)
+    pos = origen.tell()
+    muestra = origen.read(BYTES_MUESTRA)
+    origen.seek(pos)
+    return muestra if isinstance(muestra, bytes) else muestra.encode("utf-8")
+
+def _decodificar(muestra: bytes) -> tuple[str, str]:
+    if muestra.startswith(BOM_UTF8):
+        return muestra[len(BOM_UTF8):].decode("utf-8", errors="ignore"), "utf-8-sig"
+    # Se toleran hasta 3 bytes cortados al final de la muestra (carácter multibyte partido)
+    for recorte in range(4):
+        try:
+            return muestra[:len(muestra) - recorte].decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            continue
+    return muestra.decode(CODIFICACION_RESPALDO), CODIFICACION_RESPALDO
+
+def detectar_formato(origen, sep: str | None = None, encoding: str | None = None) -> FormatoCsv:
+    """
+    Detecta separador y codificación con una muestra (salvo que se indiquen)
+    y lee la cabecera para calcular las columnas a cargar.
+    """
+    muestra = _leer_muestra(origen)
+    if encoding is None:
+        texto, encoding = _decodificar(muestra)
+    else:
+        texto = muestra.decode(encoding, errors="ignore")
+    lineas = texto.splitlines()
+    if sep is None:
+        try:
+            sep = csv.Sniffer().sniff("\n".join(lineas[:50]), delimiters="".join(SEPARADORES)).delimiter
+        except csv.Error:
+            cabecera = lineas[0] if lineas else ""
+            sep = max(SEPARADORES, key=cabecera.count)
+    columnas = next(csv.reader(io.StringIO(lineas[0]), delimiter=sep)) if lineas else []
+    columnas = [c.lstrip("\ufeff") for c in columnas]
+    return FormatoCsv(sep=sep, encoding=encoding, columnas=columnas)
+
+def dtypes_entrada(columnas: list[str]) -> dict[str, str]:
+    """ID como texto (se convierte después a Int64 tolerando no numéricos), códigos como category."""
+    return {c: ("category" if c in COLUMNAS_CATEGORIA else TIPO_TEXTO) for c in columnas}
+
+def _tipar(df: pd.DataFrame) -> pd.DataFrame:
+    if COLUMNA_ID in df.columns:
+        # Los no numéricos quedan como <NA> y el pipeline los cuenta como descartados
+        df[COLUMNA_ID] = pd.to_numeric(df[COLUMNA_ID], errors="coerce").astype("Int64")
+    return df
+
+def leer_csv(origen, sep: str | None = None, encoding: str | None = None,
+             chunksize: int | None = None, formato: FormatoCsv | None = None):
+    """
+    Lee el CSV con usecols y tipos explícitos. Sin `chunksize` devuelve un
+    DataFrame (pyarrow.csv; motor C si el separador tiene más de un carácter
+    o pyarrow no puede leerlo); con `chunksize`, un iterador de DataFrames ya tipados.
+    """
+    formato = formato or detectar_formato(origen, sep, encoding)
+    opciones = dict(sep=formato.sep, encoding=formato.encoding,
+                    usecols=formato.usecols, dtype=dtypes_entrada(formato.usecols),
+                    keep_default_na=False, na_values=VALORES_NULOS)
+    if chunksize is not None:
+        return (_tipar(chunk) for chunk in _iterar_chunks(origen, chunksize, opciones))
+    if len(formato.sep) == 1:
+        try:
+            return _tipar(_leer_pyarrow(origen, formato))
+        except Exception:
+            if not isinstance(origen, (str, Path)):
+                origen.seek(0)
+    return _tipar(pd.read_csv(origen, **opciones))
+
+def _leer_pyarrow(origen, formato: FormatoCsv) -> pd.DataFrame:
+    """Fichero completo con pyarrow.csv: todo como texto y tipos de dtypes_entrada después."""
+    import pyarrow as pa  # type: ignore
+    import pyarrow.csv as pacsv  # type: ignore
+
+    # En el orden del fichero, como usecols en el motor C
+    columnas = [c for c in formato.columnas if c in formato.usecols]
+    tabla = pacsv.read_csv(
+        origen,
+        read_options=pacsv.ReadOptions(encoding=formato.encoding),
+        parse_options=pacsv.ParseOptions(delimiter=formato.sep, newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=columnas,
+            column_types={c: pa.string() for c in columnas},
+            null_values=VALORES_NULOS,
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=True,
+        ),
+    )
+    return tabla.to_pandas().astype(dtypes_entrada(columnas))
+
+def _iterar_chunks(origen, chunksize: int, opciones: dict):
+    with pd.read_csv(origen, chunksize=chunksize, **opciones) as lector:
+        yield from lector
@@ -0,0 +1,166 @@
+"""
+Procesamiento por lotes: muchos CSV (o un directorio) en paralelo con un
+ProcessPoolExecutor.
+
+Cada proceso recibe una sola vez los maestros ya compilados (IndiceLookup,
+de solo lectura) y transforma ficheros completos sin deduplicar. El proceso
+principal recorre los resultados en el orden de entrada, aplica la
+deduplicación global por teléfono/email normalizados (misma semántica
+'keep first' que sobre el CSV concatenado) y escribe una única salida.
+Como mucho hay `procesos` ficheros en curso: los resultados que terminan
+antes que uno lento anterior no se acumulan sin límite en el principal.
+"""
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+import maestros
+from dedup import IndiceDedup
+from maestros import IndiceLookup
+from normalizacion import normalizar_texto
+from perfilado import Perfilador, MedidaEtapa
+from aproximado import CruceAproximado
+from pipeline import Informe, transformar, filtrar_marca_agua, claves_dedup, PERFIL_INACTIVO
+
+_MAESTROS_WORKER: dict[str, IndiceLookup | CruceAproximado | None] = {}
+
+def expandir_entradas(entradas: list[str | Path]) -> list[Path]:
+    """Rutas de CSV a procesar: los directorios se expanden a sus *.csv (orden alfabético)."""
+    rutas: list[Path] = []
+    for e in map(Path, entradas):
+        if e.is_dir():
+            rutas += sorted(p for p in e.iterdir() if p.is_file() and p.suffix.lower() == ".csv")
+        else:
+            rutas.append(e)
+    return rutas
+
+def _iniciar_worker(idx_paises: IndiceLookup | None, idx_modalidad: IndiceLookup | None,
+                    cruce: CruceAproximado | None = None) -> None:
+    _MAESTROS_WORKER["paises"] = idx_paises
+    _MAESTROS_WORKER["modalidad"] = idx_modalidad
+    _MAESTROS_WORKER["cruce"] = cruce
+
+def _transformar_fichero(ruta: Path, opciones: dict) -> tuple[pd.DataFrame, Informe, dict[str, np.ndarray],
+                                                              float, list[MedidaEtapa]]:
+    from ingesta import leer_csv
+
+    t0 = time.perf_counter()
+    informe = Informe()
+    perfil = Perfilador(activo=opciones.get("perfilar", False))
+    with perfil.etapa("lectura_csv") as m:
+        df = leer_csv(ruta, sep=opciones.get("sep"), encoding=opciones.get("encoding"))
+        m.filas_salida = len(df)
+    informe.filas_leidas = len(df)
+    with perfil.etapa("marca_agua", len(df)) as m:
+        df = filtrar_marca_agua(df, opciones.get("marca_agua"), informe)
+        m.filas_salida = len(df)
+    aciertos: dict[str, np.ndarray] = {}
+    df = transformar(df, start_id_value=opciones.get("start_id_value"),
+                     df_paises=_MAESTROS_WORKER.get("paises"),
+                     df_modalidad=_MAESTROS_WORKER.get("modalidad"),
+                     informe=informe, deduplicar=False, perfil=perfil,
+                     cruce=_MAESTROS_WORKER.get("cruce"), aciertos=aciertos)
+    return df, informe, aciertos, time.perf_counter() - t0, perfil.medidas
+
+def _recontar_cruces(informe: Informe, df: pd.DataFrame, conservar: np.ndarray,
+                     aciertos: dict[str, np.ndarray]) -> None:
+    """
+    Los workers miden los cruces antes de la dedup global: se recuentan sobre
+    las filas conservadas, como en el modo de un solo fichero. Las filas sin
+    correspondencia conservan su valor original, del que sale la clave normalizada.
+    """
+    for maestro, columna in (("paises", "pais"), ("modalidad", "modalidad")):
+        if maestro not in aciertos:
+            continue
+        ok = aciertos[maestro][conservar]
+        setattr(informe, f"{maestro}_total", len(ok))
+        setattr(informe, f"{maestro}_ok", int(ok.sum()))
+        sin_match = pd.unique(df[columna].to_numpy(dtype=object)[~ok])
+        setattr(informe, f"{maestro}_sin_match", dict.fromkeys(normalizar_texto(str(v)) for v in sin_match))
+
+@dataclass
+class ResultadoLote:
+    informe: Informe
+    estadisticas: pd.DataFrame
+
+def procesar_lote(entradas: list[str | Path], destino: str | Path, formato: str | None = None,
+                  procesos: int | None = None, sep: str | None = None, encoding: str | None = None,
+                  start_id_value=None, marca_agua: int | None = None,
+                  df_paises: pd.DataFrame | IndiceLookup | None = None,
+                  df_modalidad: pd.DataFrame | IndiceLookup | None = None,
+                  dedup: IndiceDedup | None = None,
+                  perfil: Perfilador | None = None,
+                  cruce: CruceAproximado | None = None) -> ResultadoLote:
+    """
+    Transforma en paralelo todos los CSV de `entradas` y escribe una salida
+    única en `destino`. Devuelve el informe global y una tabla por fichero.
+    Con `perfil`, se agregan las medidas de los workers (tiempo de CPU de cada
+    proceso, no tiempo de pared del lote) y las de dedup/exportación.
+    Con `cruce`, cada worker recibe su copia; las sugerencias se reúnen en el
+    informe global.
+    """
+    from escritores import abrir_escritor
+
+    rutas = expandir_entradas(entradas)
+    if isinstance(df_paises, pd.DataFrame):
+        df_paises = maestros.indice_paises(df_paises)
+    if isinstance(df_modalidad, pd.DataFrame):
+        df_modalidad = maestros.indice_modalidad(df_modalidad)
+    dedup = dedup if dedup is not None else IndiceDedup()
+    perfil = perfil if perfil is not None else PERFIL_INACTIVO
+    opciones = dict(sep=sep, encoding=encoding, start_id_value=start_id_value, marca_agua=marca_agua,
+                    perfilar=perfil.activo)
+    procesos = min(procesos or os.cpu_count() or 1, max(len(rutas), 1))
+
+    informe_global = Informe()
+    filas_stats = []
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_worker,
+                             initargs=(df_paises, df_modalidad, cruce)) as pool, \
+         abrir_escritor(destino, formato) as escritor:
+        pendientes = iter(rutas)
+        en_curso: deque = deque()
+
+        def _enviar_siguiente() -> None:
+            ruta = next(pendientes, None)
+            if ruta is not None:
+                en_curso.append((ruta, pool.submit(_transformar_fichero, ruta, opciones)))
+
+        # Ventana deslizante de `procesos` envíos: memoria del principal acotada
+        for _ in range(procesos):
+            _enviar_siguiente()
+        # En orden de entrada, para que 'keep first' sea el del CSV concatenado
+        while en_curso:
+            ruta, futuro = en_curso.popleft()
+            df, informe, aciertos, segundos, medidas = futuro.result()
+            _enviar_siguiente()
+            perfil.extender(medidas)
+            with perfil.etapa("dedup", len(df)) as m:
+                antes = len(df)
+                conservar = dedup.filtrar(*claves_dedup(df)).to_numpy()
+                df = df.loc[conservar]
+                m.filas_salida = len(df)
+            _recontar_cruces(informe, df, conservar, aciertos)
+            informe.duplicados = antes - len(df)
+            informe.filas_salida = len(df)
+            with perfil.etapa("exportacion", len(df)) as m:
+                escritor.escribir(df)
+                m.filas_salida = len(df)
+            informe_global.combinar(informe)
+            filas_stats.append({
+                "fichero": ruta.name,
+                "filas_leidas": informe.filas_leidas,
+                "descartados_marca": informe.descartados_marca,
+                "descartados_id": informe.descartados_no_num + informe.descartados_previos,
+                "descartados_non": informe.descartados_non,
+                "duplicados": informe.duplicados,
+                "filas_salida": informe.filas_salida,
+                "paises_ok_pct": round(100 * informe.paises_ok / informe.paises_total, 1) if informe.paises_total else None,
+                "modalidad_ok_pct": round(100 * informe.modalidad_ok / informe.modalidad_total, 1) if informe.modalidad_total else None,
+                "segundos": round(segundos, 3),
+            })
+    return ResultadoLote(informe_global, pd.DataFrame(filas_stats))
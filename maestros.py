@@ -0,0 +1,388 @@
+"""
+Carga de los maestros (países y modalidad) sin dependencia de Streamlit.
+La app envuelve estas funciones con st.cache_data; la CLI las usa tal cual.
+"""
+import fnmatch
+import hashlib
+import io
+import json
+import os
+import unicodedata
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from ficheros import escritura_atomica, escribir_atomico
+from normalizacion import normalizar_unicos, normalizar_texto_series
+
+APPDIR = Path(__file__).parent
+DIR_CACHE_MAESTROS = APPDIR / ".cache_maestros"
+
+# ================== CACHÉ COLUMNAR (SIDECAR ARROW) ==================
+def _sha256_fichero(p: Path) -> str:
+    h = hashlib.sha256()
+    with open(p, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+def _ruta_sidecar(p: Path, dir_cache: Path) -> Path:
+    return dir_cache / (hashlib.sha1(str(p.resolve()).encode("utf-8")).hexdigest() + ".arrow")
+
+def _leer_sidecar(sidecar: Path):
+    """Devuelve (tabla Arrow mapeada en memoria, metadatos) o (None, {})."""
+    import pyarrow as pa  # type: ignore
+    try:
+        with pa.memory_map(str(sidecar), "r") as src:
+            tabla = pa.ipc.open_file(src).read_all()
+    except (OSError, pa.ArrowInvalid):
+        return None, {}
+    meta = json.loads((tabla.schema.metadata or {}).get(b"guias_origen", b"{}"))
+    return tabla, meta
+
+def _a_pandas(tabla) -> pd.DataFrame:
+    """tabla.to_pandas() con los nulos de las columnas de texto como NaN, igual que pd.read_excel."""
+    df = tabla.to_pandas()
+    texto = [c for c in df.columns if df[c].dtype == object]
+    if texto:
+        df[texto] = df[texto].where(df[texto].notna(), np.nan)
+    return df
+
+def _escribir_sidecar(sidecar: Path, tabla, meta: dict) -> None:
+    import pyarrow as pa  # type: ignore
+    tabla = tabla.replace_schema_metadata({"guias_origen": json.dumps(meta)})
+    with escritura_atomica(sidecar) as tmp, pa.OSFile(str(tmp), "wb") as sink, \
+            pa.ipc.new_file(sink, tabla.schema) as w:
+        w.write_table(tabla)
+
+def leer_excel_cacheado(p: Path, dir_cache: Path | None = None) -> pd.DataFrame:
+    """
+    pd.read_excel con caché Arrow IPC en `dir_cache` (por defecto DIR_CACHE_MAESTROS).
+    El sidecar se identifica por la ruta y se valida con tamaño + mtime; si
+    estos cambian pero el sha256 del contenido coincide, se reutiliza igualmente.
+    Si la caché no es escribible, se devuelve el Excel leído directamente.
+    """
+    import pyarrow as pa  # type: ignore
+
+    dir_cache = dir_cache if dir_cache is not None else DIR_CACHE_MAESTROS
+    st_ = p.stat()
+    meta = {"ruta": str(p.resolve()), "tamano": st_.st_size, "mtime_ns": st_.st_mtime_ns}
+    sidecar = _ruta_sidecar(p, dir_cache)
+    tabla, meta_cache = _leer_sidecar(sidecar) if sidecar.exists() else (None, {})
+
+    if tabla is not None and all(meta_cache.get(k) == v for k, v in meta.items()):
+        return _a_pandas(tabla)
+
+    meta["sha256"] = _sha256_fichero(p)
+    if tabla is None or meta_cache.get("sha256") != meta["sha256"]:
+        df = pd.read_excel(p)
+        try:
+            tabla = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return df
+    else:
+        df = _a_pandas(tabla)
+    try:
+        _escribir_sidecar(sidecar, tabla, meta)
+    except OSError:
+        pass
+    return df
+
+# ================== CARGA GENÉRICA ==================
+def cargar_excel_local(paths: list[Path]) -> tuple[pd.DataFrame | None, str, list[str], str, str]:
+    """
+    Intenta cargar el primer Excel que exista en 'paths'.
+    Devuelve: (df, origen, rutas_probadas, appdir, cwd)
+    """
+    probadas = []
+    for p in paths:
+        probadas.append(str(p))
+        try:
+            if p.exists():
+                df = leer_excel_cacheado(p)
+                return df, str(p), probadas, str(APPDIR), str(Path.cwd())
+        except Exception:
+            continue
+    return None, "", probadas, str(APPDIR), str(Path.cwd())
+
+_CACHE_EXCEL_REMOTO: dict[str, pd.DataFrame] = {}
+_DESCRIPCION_ORIGEN = {"red": "descargado", "revalidado": "sin cambios en origen",
+                       "cache": "caché local", "cache_caducada": "caché local; origen no disponible"}
+
+def cargar_excel_url(url: str, plazo: float | None = None) -> tuple[pd.DataFrame | None, str, str | None]:
+    """
+    Excel remoto vía remoto.descargador() (caché en disco, ETag, timeouts).
+    Con `plazo`, no espera más de esos segundos si no hay copia en caché.
+    Devuelve (df o None, origen descriptivo, motivo del fallo o None).
+    """
+    import remoto
+
+    descarga = remoto.descargador().obtener(url, plazo=plazo)
+    if not descarga.ok:
+        return None, url, descarga.error
+    if descarga.huella not in _CACHE_EXCEL_REMOTO:
+        try:
+            df = pd.read_excel(io.BytesIO(descarga.contenido))
+        except (ValueError, KeyError, zipfile.BadZipFile) as e:
+            return None, url, f"el contenido descargado no es un Excel válido ({e})"
+        if len(_CACHE_EXCEL_REMOTO) >= 4:
+            _CACHE_EXCEL_REMOTO.clear()
+        _CACHE_EXCEL_REMOTO[descarga.huella] = df
+    descripcion = _DESCRIPCION_ORIGEN[descarga.origen]
+    if descarga.revalidando:
+        descripcion += "; revalidando en segundo plano"
+    return _CACHE_EXCEL_REMOTO[descarga.huella].copy(), f"{url} ({descripcion})", descarga.error
+
+# ================== LOCALIZACIÓN DE MAESTROS ==================
+# Rutas candidatas por maestro, en orden de preferencia. Relativas a APPDIR
+# salvo que sean absolutas; "{cwd}" es el directorio de trabajo. El nombre
+# admite comodines (fnmatch, sin distinguir mayúsculas) pero no '**': no se
+# recorren subdirectorios. Se puede sobrescribir con maestros.json junto a la app.
+FICHERO_CONFIG_MAESTROS = APPDIR / "maestros.json"
+RUTAS_MAESTROS_POR_DEFECTO: dict[str, list[str]] = {
+    "paises": [
+        "Paises_landing_ISO.xlsx",
+        "data/Paises_landing_ISO.xlsx",
+        "{cwd}/Paises_landing_ISO.xlsx",
+        "{cwd}/data/Paises_landing_ISO.xlsx",
+        "/mnt/data/Paises_landing_ISO.xlsx",
+    ],
+    "modalidad": [
+        "modalidad.xlsx",
+        "data/modalidad.xlsx",
+        "{cwd}/modalidad.xlsx",
+        "{cwd}/data/modalidad.xlsx",
+        "/mnt/data/modalidad.xlsx",
+        "*modalid*.xls*",
+        "data/*modalid*.xls*",
+    ],
+}
+FICHERO_UBICACIONES = "ubicaciones.json"
+
+def rutas_configuradas(maestro: str) -> list[str]:
+    """Entradas de maestros.json para `maestro` si existen; si no, las de por defecto."""
+    if FICHERO_CONFIG_MAESTROS.exists():
+        config = json.loads(FICHERO_CONFIG_MAESTROS.read_text(encoding="utf-8"))
+        if maestro in config:
+            return list(config[maestro])
+    return RUTAS_MAESTROS_POR_DEFECTO[maestro]
+
+def _expandir(entrada: str) -> Path:
+    p = Path(entrada.replace("{cwd}", str(Path.cwd()))).expanduser()
+    return p if p.is_absolute() else APPDIR / p
+
+def _mtime_dir(directorio: Path) -> int | None:
+    try:
+        return directorio.stat().st_mtime_ns
+    except OSError:
+        return None
+
+def _coincidencias(directorio: Path, patron: str) -> list[Path]:
+    """Ficheros de `directorio` (sin recursión) cuyo nombre casa con `patron`, en orden alfabético."""
+    patron = patron.lower()
+    try:
+        with os.scandir(directorio) as it:
+            nombres = [e.name for e in it if e.is_file() and fnmatch.fnmatchcase(e.name.lower(), patron)]
+    except OSError:
+        return []
+    return [directorio / n for n in sorted(nombres)]
+
+_UBICACIONES: dict[str, dict] = {}
+
+def _ubicaciones_en_disco() -> dict:
+    try:
+        return json.loads((DIR_CACHE_MAESTROS / FICHERO_UBICACIONES).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def _guardar_ubicaciones() -> None:
+    try:
+        escribir_atomico(DIR_CACHE_MAESTROS / FICHERO_UBICACIONES, json.dumps(_UBICACIONES))
+    except OSError:
+        pass
+
+def localizar_maestro(maestro: str) -> list[Path]:
+    """
+    Ficheros existentes para `maestro`, sin duplicados y en el orden de la
+    configuración. El resultado se cachea (en memoria y en DIR_CACHE_MAESTROS)
+    junto con el mtime de cada directorio consultado: mientras no se añada,
+    borre o renombre nada en ellos, basta un stat por directorio.
+    """
+    entradas = [_expandir(e) for e in rutas_configuradas(maestro)]
+    firma = [[str(d), _mtime_dir(d)] for d in dict.fromkeys(e.parent for e in entradas)]
+    if not _UBICACIONES:
+        _UBICACIONES.update(_ubicaciones_en_disco())
+    cache = _UBICACIONES.get(maestro)
+    if cache is not None and cache.get("entradas") == [str(e) for e in entradas] and cache["firma"] == firma:
+        return [Path(r) for r in cache["rutas"]]
+
+    rutas, vistas = [], set()
+    for e in entradas:
+        for p in _coincidencias(e.parent, e.name):
+            clave = os.path.realpath(p)
+            if clave not in vistas:
+                vistas.add(clave)
+                rutas.append(p)
+    _UBICACIONES[maestro] = {"entradas": [str(e) for e in entradas], "firma": firma,
+                             "rutas": [str(r) for r in rutas]}
+    _guardar_ubicaciones()
+    return rutas
+
+def firma_maestro(maestro: str) -> tuple:
+    """(ruta, tamaño, mtime) de los candidatos: cambia si el fichero se sustituye o edita."""
+    firma = []
+    for p in localizar_maestro(maestro):
+        try:
+            st_ = p.stat()
+        except OSError:
+            continue
+        firma.append((str(p), st_.st_size, st_.st_mtime_ns))
+    return tuple(firma)
+
+def _candidatos(maestro: str) -> list[Path]:
+    """Localizados; si no hay ninguno, las rutas configuradas sin comodines (para informar de lo probado)."""
+    return localizar_maestro(maestro) or [
+        p for p in map(_expandir, rutas_configuradas(maestro)) if not any(c in p.name for c in "*?[")
+    ]
+
+def buscar_candidatos_modalidad() -> list[Path]:
+    """Maestro de modalidad: ver RUTAS_MAESTROS_POR_DEFECTO["modalidad"] y localizar_maestro."""
+    return localizar_maestro("modalidad")
+
+# ========== MAESTRO PAÍSES ==========
+def rutas_maestro_paises() -> list[Path]:
+    return _candidatos("paises")
+
+def cargar_maestro_paises(ruta: Path | None = None) -> tuple[pd.DataFrame | None, str, list[str], str, str]:
+    return cargar_excel_local([ruta] if ruta is not None else rutas_maestro_paises())
+
+def maestro_paises_valido(df: pd.DataFrame | None) -> bool:
+    return df is not None and {"País", "País_normalizado"}.issubset(df.columns)
+
+# ========== MAESTRO MODALIDAD (usa columnas EXACTAS: 'modalidad' y 'nombre') ==========
+def _normaliza_headers_y_renombra_a_min(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normaliza encabezados y, si detecta equivalentes, los renombra a 'modalidad' y 'nombre'.
+    Acepta variantes como 'Modalidad', 'NOMBRE', 'Nombre de modalidad', etc.
+    """
+    def norm(s: str) -> str:
+        s = str(s).strip().lower()
+        s = ''.join(c for c in unicodedata.normalize('NFKD', s) if not unicodedata.combining(c))
+        s = ''.join(ch if ch.isalnum() else ' ' for ch in s)
+        s = ' '.join(s.split())
+        return s
+
+    mapping = {}
+    for c in df.columns:
+        nc = norm(c)
+        if nc == "modalidad":
+            mapping[c] = "modalidad"
+        elif nc in ("nombre", "nombre modalidad", "modalidad nombre", "nombre de modalidad"):
+            mapping[c] = "nombre"
+    if mapping:
+        df = df.rename(columns=mapping)
+    return df
+
+def maestro_modalidad_valido(df: pd.DataFrame | None) -> bool:
+    return df is not None and {"modalidad", "nombre"}.issubset(df.columns)
+
+def _preparar_maestro_modalidad(df: pd.DataFrame) -> pd.DataFrame:
+    df = _normaliza_headers_y_renombra_a_min(df)
+    if maestro_modalidad_valido(df):
+        # Trims básicos
+        df["modalidad"] = df["modalidad"].astype(str).str.strip()
+        df["nombre"]    = df["nombre"].astype(str).str.strip()
+    return df
+
+def cargar_maestro_modalidad(url_hint: str | None = None, ruta: Path | None = None,
+                             plazo_url: float | None = None):
+    """
+    Maestro de modalidad: ruta explícita, URL (con `plazo_url`, sin esperar más
+    de esos segundos) o búsqueda local, en ese orden. Si la URL falla o tarda,
+    se usa el maestro local y el motivo queda en las rutas probadas.
+    """
+    appdir, cwd = str(APPDIR), str(Path.cwd())
+    # 0) Ruta explícita (CLI)
+    if ruta is not None:
+        df, origen, rutas, appdir, cwd = cargar_excel_local([ruta])
+        if df is not None:
+            df = _preparar_maestro_modalidad(df)
+        return df, origen, rutas, appdir, cwd
+
+    # 1) Si nos dan URL RAW, priorizamos
+    aviso_url = []
+    if url_hint:
+        df_url, origen_url, error_url = cargar_excel_url(url_hint, plazo=plazo_url)
+        if df_url is not None:
+            df_url = _preparar_maestro_modalidad(df_url)
+            return df_url, origen_url, ["(usada URL proporcionada)"], appdir, cwd
+        aviso_url = [f"(URL no disponible: {error_url}; se usa el maestro local)"]
+
+    # 2) Búsqueda local (rutas configuradas, sin recursión)
+    df, origen, rutas, appdir, cwd = cargar_excel_local(_candidatos("modalidad"))
+    if df is not None:
+        df = _preparar_maestro_modalidad(df)
+    return df, origen, aviso_url + rutas, appdir, cwd
+
+# ========== ÍNDICES DE LOOKUP PRECOMPILADOS ==========
+@dataclass(frozen=True)
+class IndiceLookup:
+    """
+    Maestro compilado e inmutable: claves normalizadas únicas (pd.Index) y su
+    valor. `buscar` sustituye al merge: normaliza los únicos de la entrada y
+    resuelve con un get_indexer + take, sin copiar ni reordenar el DataFrame.
+    """
+    huella: str
+    claves: pd.Index
+    valores: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.claves)
+
+    def buscar(self, s: pd.Series, resolver=None) -> tuple[pd.Series, list[str]]:
+        """
+        Devuelve (valor del maestro por fila o NaN, claves normalizadas sin correspondencia
+        en orden de aparición). `resolver(claves) -> [valor o None]` se consulta solo
+        con las claves únicas sin coincidencia exacta (alias aprendidos, cruce aproximado).
+        Los valores salen como categórica: se resuelven por único y cada fila guarda un código.
+        """
+        codigos, normalizados = normalizar_unicos(s)
+        pos = self.claves.get_indexer(normalizados)
+        valores_unicos = np.where(pos >= 0, self.valores.take(pos, mode="clip"), None) if len(self.valores) else np.full(len(pos), None, dtype=object)
+        sin_match = pd.isna(valores_unicos)
+        if resolver is not None and sin_match.any():
+            valores_unicos[sin_match] = resolver(normalizados[sin_match].tolist())
+            sin_match = pd.isna(valores_unicos)
+        cod_valores, categorias = pd.factorize(valores_unicos)
+        valores = pd.Series(pd.Categorical.from_codes(cod_valores[codigos], categorias), index=s.index, name=s.name)
+        return valores, normalizados[sin_match].tolist()
+
+_CACHE_INDICES: dict[tuple[str, str, str], IndiceLookup] = {}
+
+def huella_maestro(df: pd.DataFrame, columnas: list[str]) -> str:
+    """Hash del contenido de las columnas del maestro que intervienen en el cruce."""
+    h = pd.util.hash_pandas_object(df[columnas], index=False).to_numpy()
+    return hashlib.sha1(h.tobytes()).hexdigest()
+
+def compilar_indice(df: pd.DataFrame, col_clave: str, col_valor: str) -> IndiceLookup:
+    """
+    Compila (una vez por contenido) el índice clave normalizada → valor,
+    conservando la primera aparición de cada clave como hacía drop_duplicates.
+    """
+    huella = huella_maestro(df, [col_clave, col_valor])
+    clave_cache = (huella, col_clave, col_valor)
+    if clave_cache not in _CACHE_INDICES:
+        claves = normalizar_texto_series(df[col_clave])
+        primeras = ~claves.duplicated(keep="first").to_numpy()
+        valores = df[col_valor].to_numpy(dtype=object)[primeras]
+        valores.setflags(write=False)
+        _CACHE_INDICES[clave_cache] = IndiceLookup(huella, pd.Index(claves[primeras].to_numpy()), valores)
+    return _CACHE_INDICES[clave_cache]
+
+def indice_paises(df: pd.DataFrame | None) -> IndiceLookup | None:
+    return compilar_indice(df, "País", "País_normalizado") if maestro_paises_valido(df) else None
+
+def indice_modalidad(df: pd.DataFrame | None) -> IndiceLookup | None:
+    return compilar_indice(df, "modalidad", "nombre") if maestro_modalidad_valido(df) else None
@@ -0,0 +1,84 @@
+"""
+Normalización de texto para los cruces con los maestros (países, modalidad)
+y limpieza de una sola pasada de las columnas de texto del export.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+TAMANO_CACHE_NORMALIZACION = 65_536
+
+_RE_NO_ALFANUM = re.compile(r'[^0-9a-z]+')
+
+@lru_cache(maxsize=TAMANO_CACHE_NORMALIZACION)
+def normalizar_texto(x: str) -> str:
+    """Minúsculas, sin acentos y solo [0-9a-z] separados por un espacio."""
+    x = x.strip().lower()
+    x = ''.join(c for c in unicodedata.normalize('NFKD', x) if not unicodedata.combining(c))
+    return _RE_NO_ALFANUM.sub(' ', x).strip()
+
+def normalizar_unicos(s: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Factoriza `s` y normaliza solo sus valores únicos (memoizados con LRU
+    entre llamadas). Devuelve (códigos por fila, únicos normalizados).
+    """
+    codigos, unicos = pd.factorize(s, use_na_sentinel=False)
+    normalizados = np.array([normalizar_texto(str(u)) for u in unicos], dtype=object)
+    return codigos, normalizados
+
+def normalizar_texto_series(s: pd.Series) -> pd.Series:
+    """Propaga por código los únicos normalizados: O(valores únicos) en Python en vez de O(filas)."""
+    codigos, normalizados = normalizar_unicos(s)
+    return pd.Series(normalizados[codigos], index=s.index, name=s.name, dtype=object)
+
+# ================== LIMPIEZA DE TEXTO EN UNA PASADA ==================
+# Espacio en el sentido de str.split()/str.strip() de Python, en sintaxis RE2 (Arrow)
+_ESPACIO = r"\s\x{85}\x{1c}-\x{1f}\p{Z}"
+_RE_NOMBRE_ARROW = rf"(?s)^[{_ESPACIO}]*(?P<pila>[^{_ESPACIO}]*)[{_ESPACIO}]*(?P<apellido>.*)$"
+TEXTO_NULO = "nan"  # lo que producía astype(str) con los nulos
+
+def _a_arrow(s: pd.Series):
+    """Texto de `s` como array Arrow de strings (sin copia si ya es string[pyarrow]), nulos como TEXTO_NULO."""
+    import pyarrow as pa  # type: ignore
+    import pyarrow.compute as pc  # type: ignore
+    if isinstance(s.dtype, pd.CategoricalDtype) and pd.api.types.is_string_dtype(s.cat.categories.dtype):
+        arr = pa.array(s, from_pandas=True).dictionary_decode()
+    elif isinstance(s.dtype, pd.StringDtype):
+        arr = pa.array(s.array)
+    else:
+        arr = pa.array(s.astype(str).to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+    if isinstance(arr, pa.ChunkedArray):
+        arr = arr.combine_chunks()
+    return pc.fill_null(arr.cast(pa.string()), TEXTO_NULO)
+
+def _a_pandas(arr, index: pd.Index) -> pd.Series:
+    return pd.Series(pd.arrays.ArrowStringArray(arr), index=index)
+
+def limpiar_textos(nombre: pd.Series | None = None, telefono: pd.Series | None = None,
+                   email: pd.Series | None = None, pais: pd.Series | None = None) -> dict[str, pd.Series]:
+    """
+    Deriva en una pasada, sobre arrays Arrow y sin listas por fila:
+      nombre   → nombre_pila (primer token; nulo si no hay) y primer_apellido (resto, "" si no hay)
+      telefono → telefono_norm (sin espacios), que sirve para la dedup y para la salida
+      email    → email_norm (strip + minúsculas), clave de dedup
+      pais     → pais_base (lo anterior al primer ':' sin espacios)
+    Mismo resultado que los .astype(str).str.split()... de antes.
+    """
+    import pyarrow.compute as pc  # type: ignore
+
+    res: dict[str, pd.Series] = {}
+    if nombre is not None:
+        partes = pc.extract_regex(_a_arrow(nombre), _RE_NOMBRE_ARROW)
+        pila = partes.field("pila")
+        res["nombre_pila"] = _a_pandas(pc.if_else(pc.equal(pila, ""), None, pila), nombre.index)
+        res["primer_apellido"] = _a_pandas(partes.field("apellido"), nombre.index)
+    if telefono is not None:
+        res["telefono_norm"] = _a_pandas(pc.replace_substring(_a_arrow(telefono), " ", ""), telefono.index)
+    if email is not None:
+        res["email_norm"] = _a_pandas(pc.utf8_lower(pc.utf8_trim_whitespace(_a_arrow(email))), email.index)
+    if pais is not None:
+        base = pc.extract_regex(_a_arrow(pais), r"(?s)^(?P<base>[^:]*)").field("base")
+        res["pais_base"] = _a_pandas(pc.utf8_trim_whitespace(base), pais.index)
+    return res
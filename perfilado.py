@@ -0,0 +1,128 @@
+"""
+Instrumentación por etapas del pipeline: tiempo, filas de entrada/salida y
+memoria de cada etapa (lectura, filtros, dedup, cruces, exportación...).
+
+    perfil = Perfilador()
+    with perfil.etapa("dedup", filas_entrada=len(df)) as m:
+        df = ...
+        m.filas_salida = len(df)
+    perfil.resumen()   # DataFrame agregado por etapa
+
+Con tracemalloc=True se mide además el pico de memoria de Python por etapa
+(más lento); con cprofile=True se captura un perfil cProfile de todo lo
+ejecutado dentro de las etapas. Un Perfilador(activo=False) no mide nada.
+"""
+import io
+import time
+import tracemalloc as _tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+@dataclass
+class MedidaEtapa:
+    etapa: str
+    segundos: float = 0.0
+    filas_entrada: int | None = None
+    filas_salida: int | None = None
+    mem_pico_mb: float | None = None
+    rss_max_mb: float | None = None
+
+def _rss_max_mb() -> float | None:
+    if resource is None:
+        return None
+    # ru_maxrss está en KiB en Linux (en bytes en macOS; aquí basta como orden de magnitud)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+class Perfilador:
+    def __init__(self, activo: bool = True, tracemalloc: bool = False, cprofile: bool = False):
+        self.activo = activo
+        self.tracemalloc = activo and tracemalloc
+        self.medidas: list[MedidaEtapa] = []
+        self._profile = None
+        self._profundidad = 0
+        if activo and cprofile:
+            import cProfile
+            self._profile = cProfile.Profile()
+
+    @contextmanager
+    def etapa(self, nombre: str, filas_entrada: int | None = None):
+        medida = MedidaEtapa(nombre, filas_entrada=filas_entrada)
+        if not self.activo:
+            yield medida
+            return
+        iniciado_aqui = False
+        if self.tracemalloc:
+            if not _tracemalloc.is_tracing():
+                _tracemalloc.start()
+                iniciado_aqui = True
+            base, _ = _tracemalloc.get_traced_memory()
+            _tracemalloc.reset_peak()
+        if self._profile is not None and self._profundidad == 0:
+            self._profile.enable()
+        self._profundidad += 1
+        t0 = time.perf_counter()
+        try:
+            yield medida
+        finally:
+            medida.segundos = time.perf_counter() - t0
+            self._profundidad -= 1
+            if self._profile is not None and self._profundidad == 0:
+                self._profile.disable()
+            if self.tracemalloc:
+                _, pico = _tracemalloc.get_traced_memory()
+                medida.mem_pico_mb = max(pico - base, 0) / 2**20
+                if iniciado_aqui:
+                    _tracemalloc.stop()
+            medida.rss_max_mb = _rss_max_mb()
+            self.medidas.append(medida)
+
+    def extender(self, medidas: list[MedidaEtapa]) -> None:
+        """Añade medidas tomadas en otro perfilador (p. ej. en otro proceso)."""
+        if self.activo:
+            self.medidas.extend(medidas)
+
+    def resumen(self) -> pd.DataFrame:
+        """Agregado por etapa, en orden de primera aparición."""
+        return resumir_medidas(self.medidas)
+
+    def to_dict(self) -> dict:
+        resumen = self.resumen().astype(object)
+        return {"etapas": resumen.where(resumen.notna(), None).to_dict(orient="records"),
+                "medidas": [asdict(m) for m in self.medidas]}
+
+    def estadisticas_cprofile(self, lineas: int = 30, orden: str = "cumulative") -> str:
+        if self._profile is None:
+            return ""
+        import pstats
+        salida = io.StringIO()
+        pstats.Stats(self._profile, stream=salida).sort_stats(orden).print_stats(lineas)
+        return salida.getvalue()
+
+    def volcar_cprofile(self, ruta) -> None:
+        """Guarda el perfil en formato pstats (para snakeviz, pstats, etc.)."""
+        if self._profile is not None:
+            self._profile.dump_stats(str(ruta))
+
+def resumir_medidas(medidas: list[MedidaEtapa]) -> pd.DataFrame:
+    columnas = ["etapa", "llamadas", "segundos", "pct_tiempo", "filas_entrada", "filas_salida", "mem_pico_mb", "rss_max_mb"]
+    if not medidas:
+        return pd.DataFrame(columns=columnas)
+    df = pd.DataFrame([asdict(m) for m in medidas])
+    resumen = df.groupby("etapa", sort=False).agg(
+        llamadas=("segundos", "size"),
+        segundos=("segundos", "sum"),
+        filas_entrada=("filas_entrada", lambda s: s.sum(min_count=1)),
+        filas_salida=("filas_salida", lambda s: s.sum(min_count=1)),
+        mem_pico_mb=("mem_pico_mb", "max"),
+        rss_max_mb=("rss_max_mb", "max"),
+    ).reset_index()
+    resumen[["filas_entrada", "filas_salida"]] = resumen[["filas_entrada", "filas_salida"]].astype("Int64")
+    total = resumen["segundos"].sum()
+    resumen["pct_tiempo"] = (100 * resumen["segundos"] / total).round(1) if total else 0.0
+    return resumen[columnas]
@@ -0,0 +1,420 @@
+"""
+Pipeline de transformación de leads sin dependencia de Streamlit.
+
+Se puede usar sobre un DataFrame completo (app) o en streaming por chunks
+sobre un CSV de cualquier tamaño (CLI). Los diagnósticos se acumulan en un
+objeto `Informe` en lugar de emitirse con st.info / st.warning.
+
+La salida usa categóricas para las columnas de baja cardinalidad y no incluye
+las COLUMNAS_FIJAS: las añaden los escritores al escribir (ver con_columnas_fijas).
+"""
+from dataclasses import dataclass, field, fields, asdict
+from pathlib import Path
+from typing import Iterator
+import numpy as np
+import pandas as pd
+
+from dedup import IndiceDedup
+from normalizacion import limpiar_textos
+import maestros
+from maestros import IndiceLookup
+from perfilado import Perfilador
+from aproximado import CruceAproximado, Sugerencia, sugerencias_a_registros
+
+# ================== PARÁMETROS DEL PIPELINE ==================
+COLUMNAS_NECESARIAS = [
+    "Submission ID", "Created", "Nombre y Apellidos",
+    "Teléfono", "Email", "Guía", "Artista",
+    "gdpr_e", "gdpr_g", "campaign_fullcode", "País"
+]
+
+RENOMBRE = {
+    "Submission ID": "id_integrador",
+    "Created": "fecha_captacion",
+    "Nombre y Apellidos": "nombre",
+    "Teléfono": "telefono",
+    "Email": "email",
+    "Guía": "guia",
+    "Artista": "producto_interes",
+    "gdpr_e": "rgpd_acepta",
+    "gdpr_g": "rgpd_grupo",
+    "campaign_fullcode": "modalidad",
+    "País": "pais"
+}
+
+MAP_RGPD = {"No": "No", "Yes": "Sí"}
+MAP_PRODUCTO = {
+    "PS":  "Antonio López - Paisajes",
+    "DC":  "Manolo Valdés - Damas y Caballeros",
+    "SI":  "Sorolla Íntimo",
+    "P61": "Jaume Plensa 61",
+    "VC":  "Fernando Botero - Via Crucis",
+    "CV":  "Steve McCurry - Capturando la vida",
+}
+
+COLUMNAS_FIJAS = {
+    "mercado": "EU",
+    "idioma": "Español",
+    "tipo_registro": "Guias",
+    "marca": "Artika",
+    "subcanal": "iArtika",
+}
+
+# Columnas de baja cardinalidad: categóricas en la salida del pipeline y con
+# codificación de diccionario en Parquet
+COLUMNAS_CATEGORICAS = ["pais", "modalidad", "producto_interes", "rgpd_acepta", "rgpd_grupo", "guia", *COLUMNAS_FIJAS]
+
+CHUNKSIZE_POR_DEFECTO = 100_000
+PERFIL_INACTIVO = Perfilador(activo=False)
+MAX_MUESTRA_SIN_MATCH = 20
+
+# ================== UTILIDADES ==================
+def _muestra(valores: list[str]) -> str:
+    return ", ".join(valores[:MAX_MUESTRA_SIN_MATCH]) + ("..." if len(valores) > MAX_MUESTRA_SIN_MATCH else "")
+
+def _mapear_unicos(s: pd.Series, funcion) -> pd.Series:
+    """
+    Aplica `funcion` (Series → Series) solo a los valores únicos de `s` y
+    devuelve una categórica: cada fila guarda un código, no una cadena.
+    """
+    codigos, unicos = pd.factorize(s)
+    mapeados = funcion(pd.Series(np.asarray(unicos, dtype=object), dtype=object)).to_numpy(dtype=object)
+    cod_mapeados, categorias = pd.factorize(mapeados)
+    cod_mapeados = np.append(cod_mapeados, -1)  # el código -1 (nulo) sigue siendo nulo
+    return pd.Series(pd.Categorical.from_codes(cod_mapeados[codigos], categorias), index=s.index, name=s.name)
+
+def _rellenar_categorica(valores: pd.Series, original: pd.Series) -> pd.Series:
+    """Completa los nulos de la categórica `valores` con `original` (solo se tocan esas filas)."""
+    faltan = valores.isna() & original.notna()
+    if not faltan.any():
+        return valores
+    relleno = original[faltan].astype(object)
+    nuevas = pd.Index(relleno.unique()).difference(valores.cat.categories)
+    return valores.cat.add_categories(nuevas).fillna(relleno)
+
+def con_columnas_fijas(df: pd.DataFrame, fijas: dict[str, str] | None = None) -> pd.DataFrame:
+    """
+    Añade al final las columnas de `fijas` (por defecto COLUMNAS_FIJAS) que
+    falten, como categóricas de un único valor: 1 byte por fila en vez de una
+    columna de cadenas. Lo usan los escritores y la vista previa de la app.
+    """
+    fijas = COLUMNAS_FIJAS if fijas is None else fijas
+    faltan = {c: v for c, v in fijas.items() if c not in df.columns}
+    if not faltan:
+        return df
+    ceros = np.zeros(len(df), dtype=np.int8)
+    return df.assign(**{c: pd.Categorical.from_codes(ceros, [v]) for c, v in faltan.items()})
+
+# ================== INFORME DE DIAGNÓSTICO ==================
+@dataclass
+class Informe:
+    """
+    Diagnósticos acumulados de una ejecución (uno o varios chunks).
+    `mensajes()` los traduce a (nivel, texto) con nivel en {"info", "warning"}.
+    """
+    filas_leidas: int = 0
+    filas_salida: int = 0
+    faltan_columnas: list[str] = field(default_factory=list)
+    start_id: int | None = None
+    descartados_no_num: int = 0
+    marca_agua: int | None = None
+    descartados_marca: int = 0
+    id_maximo: int | None = None
+    descartados_previos: int = 0
+    descartados_non: int = 0
+    duplicados: int = 0
+    paises_total: int = 0
+    paises_ok: int = 0
+    paises_sin_match: dict[str, None] = field(default_factory=dict)
+    modalidad_total: int = 0
+    modalidad_ok: int = 0
+    modalidad_sin_match: dict[str, None] = field(default_factory=dict)
+    paises_sugerencias: dict[str, Sugerencia] = field(default_factory=dict)
+    modalidad_sugerencias: dict[str, Sugerencia] = field(default_factory=dict)
+
+    def mensajes(self) -> list[tuple[str, str]]:
+        msgs: list[tuple[str, str]] = []
+        if self.faltan_columnas:
+            msgs.append(("warning", f"Faltan columnas en la entrada: {self.faltan_columnas}"))
+        if self.marca_agua is not None:
+            msgs.append(("info", f"Marca de agua: se omiten {self.descartados_marca} registros con ID ≤ **{self.marca_agua}** o no numérico."))
+        if self.start_id is not None:
+            msgs.append(("info", f"Filtrado por ID desde **{self.start_id}**: no numéricos = {self.descartados_no_num}, anteriores = {max(self.descartados_previos, 0)}"))
+        if self.paises_total > 0:
+            msgs.append(("info", f"Maestro de países: {self.paises_ok} de {self.paises_total} filas normalizadas ({self.paises_ok/self.paises_total:.1%})."))
+        if self.paises_sin_match:
+            msgs.append(("warning", "Países sin correspondencia (muestra máx. 20): " + _muestra(list(self.paises_sin_match))))
+        if self.modalidad_total > 0:
+            msgs.append(("info", f"Maestro de modalidad: {self.modalidad_ok} de {self.modalidad_total} filas mapeadas ({self.modalidad_ok/self.modalidad_total:.1%})."))
+        if self.modalidad_sin_match:
+            msgs.append(("warning", "Modalidades sin correspondencia (muestra máx. 20): " + _muestra(list(self.modalidad_sin_match))))
+        for nombre, sugerencias in (("países", self.paises_sugerencias), ("modalidades", self.modalidad_sugerencias)):
+            aceptadas = sum(s.aceptada for s in sugerencias.values())
+            if aceptadas:
+                msgs.append(("info", f"Cruce aproximado de {nombre}: {aceptadas} correspondencias aceptadas automáticamente."))
+            if len(sugerencias) > aceptadas:
+                pendientes = [f"{s.clave} → {s.valor} ({s.confianza:.0%})" for s in sugerencias.values() if not s.aceptada]
+                msgs.append(("info", f"Sugerencias para {nombre} sin correspondencia (muestra máx. 20): " + _muestra(pendientes)))
+        return msgs
+
+    def combinar(self, otro: "Informe") -> "Informe":
+        """Acumula en este informe los contadores de `otro` (p. ej. el de otro fichero)."""
+        for f in fields(self):
+            if f.name in ("start_id", "marca_agua", "id_maximo"):
+                continue
+            a, b = getattr(self, f.name), getattr(otro, f.name)
+            if isinstance(a, int) and isinstance(b, int):
+                setattr(self, f.name, a + b)
+        self.faltan_columnas = list(dict.fromkeys(self.faltan_columnas + otro.faltan_columnas))
+        self.paises_sin_match.update(otro.paises_sin_match)
+        self.modalidad_sin_match.update(otro.modalidad_sin_match)
+        self.paises_sugerencias.update(otro.paises_sugerencias)
+        self.modalidad_sugerencias.update(otro.modalidad_sugerencias)
+        for campo in ("start_id", "marca_agua"):
+            if getattr(self, campo) is None:
+                setattr(self, campo, getattr(otro, campo))
+        if otro.id_maximo is not None:
+            self.id_maximo = otro.id_maximo if self.id_maximo is None else max(self.id_maximo, otro.id_maximo)
+        return self
+
+    def to_dict(self) -> dict:
+        d = asdict(self)
+        d["paises_sin_match"] = list(self.paises_sin_match)
+        d["modalidad_sin_match"] = list(self.modalidad_sin_match)
+        d["paises_sugerencias"] = sugerencias_a_registros(self.paises_sugerencias)
+        d["modalidad_sugerencias"] = sugerencias_a_registros(self.modalidad_sugerencias)
+        d["mensajes"] = [{"nivel": n, "texto": t} for n, t in self.mensajes()]
+        return d
+
+# ================== MARCA DE AGUA ==================
+def filtrar_marca_agua(df: pd.DataFrame, marca: int | None, informe: Informe) -> pd.DataFrame:
+    """
+    Descarta (sobre el CSV crudo, antes de transformar) las filas con
+    Submission ID ≤ `marca` y registra en el informe el ID máximo visto.
+    """
+    if "Submission ID" not in df.columns:
+        return df
+    ids = pd.to_numeric(df["Submission ID"], errors="coerce")
+    id_max = ids.max()
+    if pd.notna(id_max):
+        informe.id_maximo = int(id_max) if informe.id_maximo is None else max(informe.id_maximo, int(id_max))
+    if marca is None:
+        return df
+    informe.marca_agua = int(marca)
+    nuevos = (ids > marca).fillna(False).to_numpy(dtype=bool)
+    informe.descartados_marca += int((~nuevos).sum())
+    return df if nuevos.all() else df.loc[nuevos]
+
+# ================== FUNCIÓN DE TRANSFORMACIÓN ==================
+def claves_dedup(df: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
+    """
+    (telefono_norm, email_norm). Válido tanto sobre la entrada renombrada como
+    sobre la salida de `transformar`, que conserva 'telefono' y 'email'.
+    """
+    textos = limpiar_textos(telefono=df["telefono"] if "telefono" in df.columns else None,
+                            email=df["email"] if "email" in df.columns else None)
+    vacia = pd.Series("", index=df.index)
+    telefono_norm = textos.get("telefono_norm", vacia)
+    email_norm = textos.get("email_norm", vacia)
+    return telefono_norm, email_norm
+
+def _como_indice(maestro: pd.DataFrame | IndiceLookup | None, compilar) -> IndiceLookup | None:
+    return maestro if maestro is None or isinstance(maestro, IndiceLookup) else compilar(maestro)
+
+def transformar(df: pd.DataFrame, start_id_value=None,
+                df_paises: pd.DataFrame | IndiceLookup | None = None,
+                df_modalidad: pd.DataFrame | IndiceLookup | None = None,
+                informe: Informe | None = None,
+                dedup: IndiceDedup | None = None,
+                deduplicar: bool = True,
+                perfil: Perfilador | None = None,
+                cruce: CruceAproximado | None = None,
+                aciertos: dict[str, np.ndarray] | None = None) -> pd.DataFrame:
+    """
+    Aplica el pipeline a un DataFrame (completo o un chunk).
+    Los maestros pueden pasarse como DataFrame o ya compilados (IndiceLookup).
+    Para procesar por chunks, reutiliza el mismo `informe` y `dedup` en cada llamada.
+    Con deduplicar=False se omite la deduplicación para aplicarla después sobre
+    la salida (ver lotes.py); el resto de pasos es fila a fila y no le afecta.
+    La salida lleva como categóricas las COLUMNAS_CATEGORICAS y no incluye las
+    COLUMNAS_FIJAS (ver con_columnas_fijas).
+    Con `perfil`, cada etapa registra tiempo, filas y memoria. Con `cruce`, las
+    claves sin correspondencia exacta pasan por los alias aprendidos y, si está
+    activado, por el cruce aproximado (ver aproximado.py).
+    Con `aciertos`, cada cruce deja en aciertos["paises"/"modalidad"] un array
+    booleano por fila de la salida (tras los cruces no se descartan filas), para
+    recontar los porcentajes si la dedup se aplica después (ver lotes.py).
+    """
+    informe = informe if informe is not None else Informe()
+    dedup = dedup if dedup is not None else IndiceDedup()
+    perfil = perfil if perfil is not None else PERFIL_INACTIVO
+
+    with perfil.etapa("seleccion_columnas", len(df)) as m:
+        faltan = [c for c in COLUMNAS_NECESARIAS if c not in df.columns]
+        if faltan:
+            informe.faltan_columnas = faltan
+        presentes = [c for c in COLUMNAS_NECESARIAS if c in df.columns]
+        df = df[presentes].copy()
+        df.rename(columns=RENOMBRE, inplace=True)
+        m.filas_salida = len(df)
+
+    if start_id_value is not None and "id_integrador" in df.columns:
+        with perfil.etapa("filtro_id", len(df)) as m:
+            df["id_integrador"] = pd.to_numeric(df["id_integrador"], errors="coerce")
+            total_antes = len(df)
+            df = df.dropna(subset=["id_integrador"])
+            descartados_no_num = total_antes - len(df)
+            df = df.loc[df["id_integrador"] >= int(start_id_value)]
+            informe.start_id = int(start_id_value)
+            informe.descartados_no_num += descartados_no_num
+            informe.descartados_previos += total_antes - descartados_no_num - len(df)
+            m.filas_salida = len(df)
+
+    if "producto_interes" in df.columns:
+        with perfil.etapa("filtro_non", len(df)) as m:
+            antes = len(df)
+            df = df[~df["producto_interes"].astype(str).str.contains("NON", case=False, na=False)]
+            informe.descartados_non += antes - len(df)
+            m.filas_salida = len(df)
+
+    # Limpieza de texto en una pasada (Arrow): las claves normalizadas sirven
+    # tanto para la dedup como para la salida ('telefono' sale ya normalizado)
+    with perfil.etapa("limpieza_texto", len(df)) as m:
+        textos = limpiar_textos(
+            nombre=df["nombre"] if "nombre" in df.columns else None,  # (este es el nombre de la persona tras RENOMBRE)
+            telefono=df["telefono"] if "telefono" in df.columns else None,
+            email=df["email"] if "email" in df.columns else None,
+            pais=df["pais"] if "pais" in df.columns else None,
+        )
+        if "telefono_norm" in textos:
+            df["telefono"] = textos["telefono_norm"]
+        if "pais_base" in textos:
+            df["pais"] = textos["pais_base"]
+        if "nombre_pila" in textos:
+            df["nombre_pila"] = textos["nombre_pila"]
+            df["primer_apellido"] = textos["primer_apellido"]
+            df.drop(columns=["nombre"], inplace=True)  # liberamos el nombre personal para evitar colisión con 'nombre' de modalidad
+        m.filas_salida = len(df)
+
+    if deduplicar:
+        with perfil.etapa("dedup", len(df)) as m:
+            antes = len(df)
+            vacia = pd.Series("", index=df.index)
+            df = df.loc[dedup.filtrar(textos.get("telefono_norm", vacia), textos.get("email_norm", vacia))]
+            informe.duplicados += antes - len(df)
+            m.filas_salida = len(df)
+
+    if "id_integrador" in df.columns:
+        with perfil.etapa("formato_id", len(df)) as m:
+            df["id_integrador"] = pd.to_numeric(df["id_integrador"], errors="coerce").astype("Int64").astype(str) + "-es_guias"
+            m.filas_salida = len(df)
+
+    # --- Cruce PAÍSES (índice precompilado: sin merge ni copia) ---
+    idx_paises = _como_indice(df_paises, maestros.indice_paises)
+    if idx_paises is not None and "pais" in df.columns:
+        with perfil.etapa("cruce_paises", len(df)) as m:
+            resolver = cruce.resolver("paises", idx_paises, informe.paises_sugerencias) if cruce else None
+            valores, no_match = idx_paises.buscar(df["pais"], resolver)
+            informe.paises_total += len(df)
+            informe.paises_ok += int(valores.notna().sum())
+            informe.paises_sin_match.update(dict.fromkeys(no_match))
+            if aciertos is not None:
+                aciertos["paises"] = valores.notna().to_numpy()
+            df["pais"] = _rellenar_categorica(valores, df["pais"])
+            m.filas_salida = len(df)
+
+    with perfil.etapa("mapeos", len(df)) as m:
+        # Map RGPD (sobre los valores únicos; la salida queda categórica)
+        if "rgpd_acepta" in df.columns: df["rgpd_acepta"] = _mapear_unicos(df["rgpd_acepta"], lambda u: u.map(MAP_RGPD))
+        if "rgpd_grupo"  in df.columns: df["rgpd_grupo"]  = _mapear_unicos(df["rgpd_grupo"], lambda u: u.map(MAP_RGPD))
+
+        # Map producto_interes
+        if "producto_interes" in df.columns:
+            df["producto_interes"] = _mapear_unicos(
+                df["producto_interes"], lambda u: u.astype(str).str.strip().map(MAP_PRODUCTO).fillna(u))
+        if "guia" in df.columns: df["guia"] = df["guia"].astype("category")
+        m.filas_salida = len(df)
+
+    # --- Cruce MODALIDAD (usa EXACTAMENTE columnas 'modalidad' y 'nombre' del maestro) ---
+    idx_modalidad = _como_indice(df_modalidad, maestros.indice_modalidad)
+    if idx_modalidad is not None and "modalidad" in df.columns:
+        with perfil.etapa("cruce_modalidad", len(df)) as m:
+            resolver = cruce.resolver("modalidad", idx_modalidad, informe.modalidad_sugerencias) if cruce else None
+            valores, no_match = idx_modalidad.buscar(df["modalidad"], resolver)
+            informe.modalidad_total += len(df)
+            informe.modalidad_ok += int(valores.notna().sum())
+            informe.modalidad_sin_match.update(dict.fromkeys(no_match))
+            if aciertos is not None:
+                aciertos["modalidad"] = valores.notna().to_numpy()
+            # Sustitución: si hay nombre en maestro, reemplaza el código de 'modalidad'
+            df["modalidad"] = _rellenar_categorica(valores, df["modalidad"])
+            m.filas_salida = len(df)
+
+    # Las COLUMNAS_FIJAS no se materializan aquí: las añaden los escritores
+    with perfil.etapa("orden_columnas", len(df)) as m:
+        cols = list(df.columns)
+        orden = ["id_integrador", "fecha_captacion", "nombre_pila", "primer_apellido"]
+        resto = [c for c in cols if c not in orden]
+        df = df[[c for c in orden if c in df.columns] + resto]
+        m.filas_salida = len(df)
+    informe.filas_salida += len(df)
+    return df
+
+# ================== STREAMING POR CHUNKS ==================
+def iterar_transformado(origen, sep: str | None = None, encoding: str | None = None,
+                        chunksize: int = CHUNKSIZE_POR_DEFECTO, start_id_value=None,
+                        marca_agua: int | None = None,
+                        df_paises: pd.DataFrame | IndiceLookup | None = None,
+                        df_modalidad: pd.DataFrame | IndiceLookup | None = None,
+                        informe: Informe | None = None,
+                        dedup: IndiceDedup | None = None,
+                        perfil: Perfilador | None = None,
+                        cruce: CruceAproximado | None = None) -> Iterator[pd.DataFrame]:
+    """
+    Lee el CSV en chunks de `chunksize` filas y produce cada chunk transformado.
+    La memoria se mantiene acotada al tamaño del chunk (más 8 bytes por clave de dedup).
+    Separador y codificación se detectan si no se indican (ver ingesta.py).
+    Con `marca_agua`, las filas ya procesadas se descartan antes de transformar.
+    """
+    from ingesta import leer_csv
+
+    informe = informe if informe is not None else Informe()
+    dedup = dedup if dedup is not None else IndiceDedup()
+    perfil = perfil if perfil is not None else PERFIL_INACTIVO
+    # Los maestros se compilan una sola vez para todos los chunks
+    df_paises = _como_indice(df_paises, maestros.indice_paises)
+    df_modalidad = _como_indice(df_modalidad, maestros.indice_modalidad)
+    chunks = iter(leer_csv(origen, sep=sep, encoding=encoding, chunksize=chunksize))
+    while True:
+        with perfil.etapa("lectura_csv") as m:
+            chunk = next(chunks, None)
+            m.filas_salida = 0 if chunk is None else len(chunk)
+        if chunk is None:
+            break
+        informe.filas_leidas += len(chunk)
+        if marca_agua is not None:
+            with perfil.etapa("marca_agua", len(chunk)) as m:
+                chunk = filtrar_marca_agua(chunk, marca_agua, informe)
+                m.filas_salida = len(chunk)
+        else:
+            chunk = filtrar_marca_agua(chunk, marca_agua, informe)
+        yield transformar(chunk, start_id_value=start_id_value,
+                          df_paises=df_paises, df_modalidad=df_modalidad,
+                          informe=informe, dedup=dedup, perfil=perfil, cruce=cruce)
+
+def procesar_csv(origen, destino: str | Path, formato: str | None = None,
+                 perfil: Perfilador | None = None, **opciones) -> Informe:
+    """
+    Transforma `origen` (ruta o buffer CSV) y lo escribe en `destino` chunk a chunk.
+    `formato` se deduce de la extensión si no se indica. Devuelve el `Informe`.
+    """
+    from escritores import abrir_escritor
+
+    perfil = perfil if perfil is not None else PERFIL_INACTIVO
+    informe = Informe()
+    with abrir_escritor(destino, formato) as escritor:
+        for df in iterar_transformado(origen, informe=informe, perfil=perfil, **opciones):
+            with perfil.etapa("exportacion", len(df)) as m:
+                escritor.escribir(df)
+                m.filas_salida = len(df)
+    return informe
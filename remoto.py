@@ -0,0 +1,180 @@
+"""
+Descarga de maestros remotos (URL RAW de GitHub) acotada en tiempo y con
+caché en disco.
+
+- Sesión HTTP compartida (pool de conexiones) con timeouts de conexión y de
+  lectura y reintentos solo ante errores transitorios.
+- Caché en DIR_CACHE_REMOTO: contenido + ETag/Last-Modified. Se revalida con
+  If-None-Match / If-Modified-Since (un 304 no vuelve a descargar nada).
+- `obtener` no bloquea la página: si hay copia en caché la sirve al momento
+  (revalidando en segundo plano si está caducada); si no la hay, espera como
+  mucho `plazo` segundos y, si no llega, devuelve una descarga sin contenido
+  para que el llamador use el maestro local. La descarga sigue en segundo plano y queda en caché
+  para el siguiente rerun.
+
+La sesión y el directorio de caché se pueden inyectar, así que se puede
+probar contra un servidor HTTP local.
+"""
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as PlazoAgotado
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from ficheros import escribir_atomico
+
+APPDIR = Path(__file__).parent
+DIR_CACHE_REMOTO = APPDIR / ".cache_remoto"
+
+TIMEOUT_CONEXION = 3.05
+TIMEOUT_LECTURA = 10.0
+MAX_EDAD_SEGUNDOS = 300        # antes de esto no se revalida
+PLAZO_POR_DEFECTO = 2.0        # lo máximo que espera la página sin copia en caché
+REINTENTOS = 2
+
+@lru_cache(maxsize=1)
+def sesion_compartida():
+    """requests.Session con pool de conexiones y reintentos en errores transitorios."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    sesion = requests.Session()
+    # Sin reintentos de lectura: multiplicarían el tiempo máximo de espera
+    reintentos = Retry(total=REINTENTOS, connect=REINTENTOS, read=0, status=REINTENTOS, backoff_factor=0.3,
+                       status_forcelist=(502, 503, 504), allowed_methods=frozenset({"GET"}))
+    adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=reintentos)
+    sesion.mount("https://", adaptador)
+    sesion.mount("http://", adaptador)
+    return sesion
+
+@dataclass(frozen=True)
+class Descarga:
+    """
+    Resultado de una descarga. `origen`: "red" (200), "revalidado" (304),
+    "cache" (copia local sin consultar) o "cache_caducada" (la red falló y se
+    sirve la copia). `contenido` es None si no hay datos; `error` explica por qué.
+    """
+    url: str
+    contenido: bytes | None
+    origen: str
+    huella: str | None = None
+    error: str | None = None
+    revalidando: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.contenido is not None
+
+class DescargadorRemoto:
+    def __init__(self, dir_cache: Path | None = None, sesion=None,
+                 timeout_conexion: float = TIMEOUT_CONEXION, timeout_lectura: float = TIMEOUT_LECTURA,
+                 max_edad: float = MAX_EDAD_SEGUNDOS):
+        self.dir_cache = Path(dir_cache) if dir_cache is not None else DIR_CACHE_REMOTO
+        self._sesion = sesion
+        self.timeout = (timeout_conexion, timeout_lectura)
+        self.max_edad = max_edad
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="descarga-maestro")
+        self._en_curso: dict[str, Future] = {}
+        self._cerrojo = threading.Lock()
+
+    @property
+    def sesion(self):
+        return self._sesion if self._sesion is not None else sesion_compartida()
+
+    # ----- caché en disco -----
+    def _rutas(self, url: str) -> tuple[Path, Path]:
+        base = self.dir_cache / hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return base.with_suffix(".bin"), base.with_suffix(".json")
+
+    def _leer_cache(self, url: str) -> tuple[bytes | None, dict]:
+        datos, meta = self._rutas(url)
+        try:
+            return datos.read_bytes(), json.loads(meta.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None, {}
+
+    def _escribir_cache(self, url: str, contenido: bytes | None, meta: dict) -> None:
+        datos, ruta_meta = self._rutas(url)
+        if contenido is not None:
+            escribir_atomico(datos, contenido)
+        # Los metadatos van después: nunca apuntan a un contenido que no está escrito
+        escribir_atomico(ruta_meta, json.dumps(meta))
+
+    # ----- descarga -----
+    def descargar(self, url: str) -> Descarga:
+        """GET condicional (bloqueante, acotado por los timeouts) que actualiza la caché."""
+        import requests
+
+        en_cache, meta = self._leer_cache(url)
+        cabeceras = {}
+        if en_cache is not None:
+            if meta.get("etag"):
+                cabeceras["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                cabeceras["If-Modified-Since"] = meta["last_modified"]
+        try:
+            resp = self.sesion.get(url, headers=cabeceras, timeout=self.timeout)
+            if resp.status_code == 304 and en_cache is not None:
+                meta["comprobado"] = time.time()
+                self._escribir_cache(url, None, meta)
+                return Descarga(url, en_cache, "revalidado", meta.get("sha1"))
+            resp.raise_for_status()
+        except (requests.RequestException, OSError) as e:
+            if en_cache is not None:
+                return Descarga(url, en_cache, "cache_caducada", meta.get("sha1"), error=str(e))
+            return Descarga(url, None, "red", error=str(e))
+
+        contenido = resp.content
+        meta = {
+            "url": url,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "sha1": hashlib.sha1(contenido).hexdigest(),
+            "comprobado": time.time(),
+        }
+        try:
+            self._escribir_cache(url, contenido, meta)
+        except OSError:
+            pass
+        return Descarga(url, contenido, "red", meta["sha1"])
+
+    def _descargar_en_segundo_plano(self, url: str) -> Future:
+        with self._cerrojo:
+            futuro = self._en_curso.get(url)
+            if futuro is None or futuro.done():
+                futuro = self._pool.submit(self.descargar, url)
+                self._en_curso[url] = futuro
+            return futuro
+
+    def obtener(self, url: str, plazo: float | None = PLAZO_POR_DEFECTO) -> Descarga:
+        """
+        Sirve la copia en caché si existe (revalidando en segundo plano si ha
+        caducado). Sin copia, espera la descarga como mucho `plazo` segundos.
+        Si no llega a tiempo, devuelve una Descarga sin contenido y la
+        descarga continúa en segundo plano. Con plazo=None (CLI) todo es
+        síncrono, acotado solo por los timeouts.
+        """
+        en_cache, meta = self._leer_cache(url)
+        if en_cache is not None:
+            if time.time() - meta.get("comprobado", 0) < self.max_edad:
+                return Descarga(url, en_cache, "cache", meta.get("sha1"))
+            if plazo is None:
+                return self.descargar(url)
+            self._descargar_en_segundo_plano(url)
+            return Descarga(url, en_cache, "cache", meta.get("sha1"), revalidando=True)
+        if plazo is None:
+            return self.descargar(url)
+        futuro = self._descargar_en_segundo_plano(url)
+        try:
+            return futuro.result(timeout=plazo)
+        except PlazoAgotado:
+            return Descarga(url, None, "red", error=f"sin respuesta en {plazo:g} s (sigue descargando en segundo plano)")
+
+@lru_cache(maxsize=1)
+def descargador() -> DescargadorRemoto:
+    """Descargador compartido por el proceso (la app y la CLI)."""
+    return DescargadorRemoto()
@@ -0,0 +1,57 @@
+"""IndiceDedup: 'keep first' como drop_duplicates sobre el CSV concatenado y persistencia entre ejecuciones."""
+import numpy as np
+import pandas as pd
+
+from dedup import IndiceDedup, HUELLAS_VACIAS
+
+def _referencia(df: pd.DataFrame) -> pd.Index:
+    """La deduplicación original: por teléfono y, sobre las supervivientes, por email."""
+    return df.drop_duplicates(subset=["telefono"]).drop_duplicates(subset=["email"]).index
+
+def _datos(n: int = 5000, semilla: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(semilla)
+    telefono = pd.Series(rng.integers(0, n // 2, n).astype(str))
+    email = pd.Series([f"lead{i}@x.es" for i in rng.integers(0, n // 2, n)])
+    telefono[rng.random(n) < 0.05] = "nan"
+    email[rng.random(n) < 0.05] = ""
+    return pd.DataFrame({"telefono": telefono, "email": email})
+
+def test_keep_first_entre_chunks_igual_que_drop_duplicates():
+    df = _datos()
+    dedup = IndiceDedup()
+    conservadas = [chunk.index[dedup.filtrar(chunk["telefono"], chunk["email"]).to_numpy()]
+                   for chunk in (df.iloc[i:i + 777] for i in range(0, len(df), 777))]
+    assert pd.Index(np.concatenate(conservadas)).equals(_referencia(df))
+
+def test_guardar_y_cargar_conserva_las_huellas(tmp_path):
+    df = _datos()
+    dedup = IndiceDedup()
+    dedup.filtrar(df["telefono"], df["email"])
+    dedup.guardar(tmp_path / "dedup.npz")
+    cargado = IndiceDedup.cargar(tmp_path / "dedup.npz")
+    # Las mismas claves no vacías, y todo lo ya visto se descarta en la ejecución siguiente
+    assert np.array_equal(cargado.telefonos.array(), np.setdiff1d(dedup.telefonos.array(), HUELLAS_VACIAS))
+    assert np.array_equal(cargado.emails.array(), np.setdiff1d(dedup.emails.array(), HUELLAS_VACIAS))
+    vistos = df[(df["telefono"] != "nan") & (df["email"] != "")]
+    assert not cargado.filtrar(vistos["telefono"], vistos["email"]).any()
+
+def test_cargar_inexistente_devuelve_indice_vacio(tmp_path):
+    dedup = IndiceDedup.cargar(tmp_path / "no_existe.npz")
+    assert len(dedup.telefonos) == 0 and len(dedup.emails) == 0
+
+def test_claves_vacias_se_deduplican_en_la_ejecucion_pero_no_se_persisten(tmp_path):
+    dia1 = pd.DataFrame({"telefono": ["nan", "600111222"], "email": ["a@x.es", ""]})
+    dedup = IndiceDedup()
+    # Dentro de la ejecución, como drop_duplicates: un segundo teléfono vacío es duplicado
+    assert dedup.filtrar(dia1["telefono"], dia1["email"]).tolist() == [True, True]
+    assert dedup.filtrar(pd.Series(["nan"]), pd.Series(["b@x.es"])).tolist() == [False]
+    dedup.guardar(tmp_path / "dedup.npz")
+
+    dia2 = pd.DataFrame({"telefono": ["nan", "600999888"], "email": ["e@x.es", ""]})
+    siguiente = IndiceDedup.cargar(tmp_path / "dedup.npz")
+    assert siguiente.filtrar(dia2["telefono"], dia2["email"]).tolist() == [True, True]
+
+def test_cargar_limpia_claves_vacias_de_indices_antiguos(tmp_path):
+    np.savez(tmp_path / "viejo.npz", telefonos=np.sort(HUELLAS_VACIAS), emails=np.sort(HUELLAS_VACIAS))
+    dedup = IndiceDedup.cargar(tmp_path / "viejo.npz")
+    assert dedup.filtrar(pd.Series(["nan"]), pd.Series([""])).tolist() == [True]
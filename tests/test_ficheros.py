@@ -0,0 +1,22 @@
+"""escritura_atomica: el destino se sustituye entero o no se toca."""
+import pytest
+
+from ficheros import escritura_atomica, escribir_atomico
+
+def test_escribe_texto_y_bytes(tmp_path):
+    ruta = tmp_path / "sub" / "estado.json"
+    escribir_atomico(ruta, '{"ultimo_id": 1}')
+    assert ruta.read_text(encoding="utf-8") == '{"ultimo_id": 1}'
+    escribir_atomico(ruta, b"\x00\x01")
+    assert ruta.read_bytes() == b"\x00\x01"
+    assert list(ruta.parent.iterdir()) == [ruta]
+
+def test_un_fallo_deja_el_destino_intacto_y_sin_temporal(tmp_path):
+    ruta = tmp_path / "dedup.npz"
+    ruta.write_bytes(b"anterior")
+    with pytest.raises(RuntimeError):
+        with escritura_atomica(ruta) as tmp:
+            tmp.write_bytes(b"a medias")
+            raise RuntimeError
+    assert ruta.read_bytes() == b"anterior"
+    assert list(tmp_path.iterdir()) == [ruta]
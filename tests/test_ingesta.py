@@ -0,0 +1,50 @@
+"""La lectura completa (pyarrow) y la lectura por chunks (motor C) deben dar el mismo DataFrame."""
+import io
+import pandas as pd
+import pytest
+
+import ingesta
+
+CABECERA = "Submission ID,Created,Nombre y Apellidos,Teléfono,Email,Guía,Artista,gdpr_e,gdpr_g,campaign_fullcode,País\n"
+FILAS = [
+    "1,2025-02-03T10:11:12Z,Ana López,0611222333,a@b.es,1,PS,Yes,No,ABC,España\n",
+    "2,2025-02-01,Pepe Pérez,0622333444,NA,0,,\"\",null,N/A,\n",
+    "x,2025-02-05 10:00:00,  ,0600111222,c@d.es,1,DC,No,Yes,,Perú\n",
+]
+
+def _csv(encoding: str = "utf-8", sep: str = ",") -> bytes:
+    return (CABECERA + "".join(FILAS)).replace(",", sep).encode(encoding)
+
+def _leer_ambos(datos: bytes) -> tuple[pd.DataFrame, pd.DataFrame]:
+    completo = ingesta.leer_csv(io.BytesIO(datos))
+    por_chunks = next(iter(ingesta.leer_csv(io.BytesIO(datos), chunksize=len(FILAS))))
+    return completo, por_chunks
+
+@pytest.mark.parametrize("encoding, sep", [("utf-8", ","), ("utf-8", ";"), ("latin-1", ";")])
+def test_lectura_completa_igual_que_por_chunks(encoding, sep):
+    completo, por_chunks = _leer_ambos(_csv(encoding, sep))
+    pd.testing.assert_frame_equal(completo, por_chunks)
+
+def test_texto_sin_inferencia_de_tipos():
+    completo, _ = _leer_ambos(_csv())
+    assert completo["Teléfono"].tolist() == ["0611222333", "0622333444", "0600111222"]
+    assert completo["Created"].tolist() == ["2025-02-03T10:11:12Z", "2025-02-01", "2025-02-05 10:00:00"]
+    assert list(completo["Guía"].cat.categories) == ["0", "1"]
+    assert completo["Submission ID"].tolist()[:2] == [1, 2] and completo["Submission ID"].isna().iloc[2]
+
+def test_pyarrow_sin_recurrir_al_motor_c():
+    pytest.importorskip("pyarrow")
+    datos = _csv()
+    formato = ingesta.detectar_formato(io.BytesIO(datos))
+    completo = ingesta._tipar(ingesta._leer_pyarrow(io.BytesIO(datos), formato))
+    _, por_chunks = _leer_ambos(datos)
+    pd.testing.assert_frame_equal(completo, por_chunks)
+
+def test_valores_nulos_iguales_en_ambos_motores():
+    filas = [f"{i},2025-01-01,Ana,{nulo},a@b.es,1,PS,Yes,No,X,España\n" for i, nulo in enumerate(ingesta.VALORES_NULOS)]
+    datos = (CABECERA + "".join(filas) + "99,2025-01-01,Ana,-,a@b.es,1,PS,Yes,No,X,España\n").encode("utf-8")
+    completo = ingesta.leer_csv(io.BytesIO(datos))
+    por_chunks = next(iter(ingesta.leer_csv(io.BytesIO(datos), chunksize=len(filas) + 1)))
+    pd.testing.assert_frame_equal(completo, por_chunks)
+    assert completo["Teléfono"].isna().sum() == len(ingesta.VALORES_NULOS)
+    assert completo["Teléfono"].iloc[-1] == "-"
@@ -0,0 +1,52 @@
+"""El modo lote debe dar la misma salida e informe que un solo fichero con el CSV concatenado."""
+import pandas as pd
+import pytest
+
+from lotes import procesar_lote
+from pipeline import COLUMNAS_NECESARIAS, procesar_csv
+
+MAESTRO_PAISES = pd.DataFrame({"País": ["España", "Perú"], "País_normalizado": ["ES", "PE"]})
+MAESTRO_MODALIDAD = pd.DataFrame({"modalidad": ["M1", "M2"], "nombre": ["Landing 1", "Landing 2"]})
+
+def _fichero(ini: int, n: int) -> pd.DataFrame:
+    ids = range(ini, ini + n)
+    return pd.DataFrame({
+        "Submission ID": [str(i) for i in ids],
+        "Created": "2025-01-01",
+        "Nombre y Apellidos": "Ana López",
+        # Teléfonos y emails que se repiten entre ficheros (la dedup global los descarta)
+        "Teléfono": [f"600{i % 40:06d}" for i in ids],
+        "Email": [f"l{i % 55}@x.es" for i in ids],
+        "Guía": "Sí",
+        "Artista": "PS",
+        "gdpr_e": "Yes",
+        "gdpr_g": "No",
+        # Las filas sin correspondencia caen sobre todo en duplicados
+        "campaign_fullcode": ["M1" if i % 3 else "SINMAESTRO" for i in ids],
+        "País": ["España" if i % 4 else ("Narnia" if i < 50 else "Perú") for i in ids],
+    })[COLUMNAS_NECESARIAS]
+
+@pytest.fixture
+def ficheros(tmp_path):
+    d = tmp_path / "exports"
+    d.mkdir()
+    partes = [_fichero(i * 30, 30) for i in range(4)]
+    for i, parte in enumerate(partes):
+        parte.to_csv(d / f"parte{i}.csv", index=False)
+    pd.concat(partes).to_csv(tmp_path / "todo.csv", index=False)
+    return d, tmp_path / "todo.csv"
+
+def test_lote_igual_que_fichero_concatenado(tmp_path, ficheros):
+    directorio, concatenado = ficheros
+    opciones = dict(df_paises=MAESTRO_PAISES, df_modalidad=MAESTRO_MODALIDAD)
+    unico = procesar_csv(concatenado, tmp_path / "unico.csv.gz", chunksize=25, **opciones)
+    resultado = procesar_lote([directorio], tmp_path / "lote.csv.gz", procesos=2, **opciones)
+    lote = resultado.informe
+
+    assert pd.read_csv(tmp_path / "lote.csv.gz").equals(pd.read_csv(tmp_path / "unico.csv.gz"))
+    for campo in ("filas_salida", "duplicados", "paises_total", "paises_ok", "modalidad_total", "modalidad_ok"):
+        assert getattr(lote, campo) == getattr(unico, campo), campo
+    assert set(lote.paises_sin_match) == set(unico.paises_sin_match) == {"narnia"}
+    assert lote.mensajes() == unico.mensajes()
+    # Los porcentajes por fichero se miden sobre las filas que se escriben
+    assert resultado.estadisticas["filas_salida"].sum() == unico.filas_salida
@@ -0,0 +1,31 @@
+"""La caché Arrow de los maestros debe devolver lo mismo que leer el Excel directamente."""
+import pandas as pd
+import pytest
+
+import maestros
+
+@pytest.fixture
+def excel_modalidad(tmp_path):
+    df = pd.DataFrame({
+        "Modalidad": ["ARTIKAINESPSWEBLANEUMET001", "ARTIKAINESDCWEBLANEUMET002", None],
+        "Nombre": ["Landing Paisajes", None, "Sin código"],
+        "Orden": [1, 2, None],
+    })
+    ruta = tmp_path / "modalidad.xlsx"
+    df.to_excel(ruta, index=False)
+    return ruta
+
+def test_arranque_en_caliente_igual_que_en_frio(tmp_path, excel_modalidad):
+    pytest.importorskip("pyarrow")
+    dir_cache = tmp_path / "cache"
+    directo = pd.read_excel(excel_modalidad)
+    frio = maestros.leer_excel_cacheado(excel_modalidad, dir_cache)
+    caliente = maestros.leer_excel_cacheado(excel_modalidad, dir_cache)
+    assert list(dir_cache.iterdir()), "no se escribió el sidecar"
+    pd.testing.assert_frame_equal(frio, directo)
+    pd.testing.assert_frame_equal(caliente, directo)
+    # assert_frame_equal no distingue None de NaN; astype(str) sí ("None" frente a "nan")
+    pd.testing.assert_frame_equal(caliente.astype(str), directo.astype(str))
+    # Lo que llega al cruce de modalidad tampoco depende de la caché
+    pd.testing.assert_frame_equal(maestros._preparar_maestro_modalidad(caliente),
+                                  maestros._preparar_maestro_modalidad(directo))
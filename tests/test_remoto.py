@@ -0,0 +1,94 @@
+"""DescargadorRemoto contra un servidor HTTP local: 200, revalidación con ETag/304, timeouts y segundo plano."""
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from remoto import DescargadorRemoto
+
+CONTENIDO = b"modalidad;nombre\nA;Presencial\n"
+ETAG = '"%s"' % hashlib.md5(CONTENIDO).hexdigest()
+
+@pytest.fixture
+def servidor():
+    """Sirve CONTENIDO con ETag; `retardo` y las peticiones recibidas se controlan desde el test."""
+    estado = {"retardo": 0.0, "peticiones": []}
+
+    class Manejador(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            estado["peticiones"].append(self.headers.get("If-None-Match"))
+            time.sleep(estado["retardo"])
+            if self.headers.get("If-None-Match") == ETAG:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", str(len(CONTENIDO)))
+            self.end_headers()
+            self.wfile.write(CONTENIDO)
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+    hilo = threading.Thread(target=srv.serve_forever, daemon=True)
+    hilo.start()
+    estado["url"] = f"http://127.0.0.1:{srv.server_port}/modalidad.csv"
+    yield estado
+    srv.shutdown()
+    srv.server_close()
+
+def test_descarga_200_y_escribe_la_cache(servidor, tmp_path):
+    d = DescargadorRemoto(dir_cache=tmp_path)
+    r = d.descargar(servidor["url"])
+    assert r.ok and r.origen == "red" and r.contenido == CONTENIDO
+    assert r.huella == hashlib.sha1(CONTENIDO).hexdigest()
+    assert len(list(tmp_path.glob("*.bin"))) == 1 and len(list(tmp_path.glob("*.json"))) == 1
+    # Con la copia fresca, obtener no vuelve a la red
+    assert d.obtener(servidor["url"]).origen == "cache"
+    assert servidor["peticiones"] == [None]
+
+def test_revalida_con_etag_y_304(servidor, tmp_path):
+    d = DescargadorRemoto(dir_cache=tmp_path)
+    d.descargar(servidor["url"])
+    r = d.descargar(servidor["url"])
+    assert r.origen == "revalidado" and r.contenido == CONTENIDO
+    assert servidor["peticiones"] == [None, ETAG]
+
+def test_timeout_de_lectura_sin_cache(servidor, tmp_path):
+    servidor["retardo"] = 1.0
+    d = DescargadorRemoto(dir_cache=tmp_path, timeout_lectura=0.2)
+    t0 = time.perf_counter()
+    r = d.obtener(servidor["url"], plazo=None)
+    assert not r.ok and r.error
+    assert time.perf_counter() - t0 < 0.9
+
+def test_timeout_de_lectura_sirve_la_cache_caducada(servidor, tmp_path):
+    DescargadorRemoto(dir_cache=tmp_path).descargar(servidor["url"])
+    servidor["retardo"] = 1.0
+    r = DescargadorRemoto(dir_cache=tmp_path, timeout_lectura=0.2).descargar(servidor["url"])
+    assert r.origen == "cache_caducada" and r.contenido == CONTENIDO and r.error
+
+def test_plazo_agotado_sigue_en_segundo_plano(servidor, tmp_path):
+    servidor["retardo"] = 0.5
+    d = DescargadorRemoto(dir_cache=tmp_path)
+    t0 = time.perf_counter()
+    r = d.obtener(servidor["url"], plazo=0.1)
+    assert not r.ok and "segundo plano" in r.error
+    assert time.perf_counter() - t0 < 0.4
+    # La descarga termina en segundo plano y el siguiente rerun la sirve de la caché
+    d._en_curso[servidor["url"]].result(timeout=5)
+    r = d.obtener(servidor["url"], plazo=0.1)
+    assert r.ok and r.origen == "cache" and r.contenido == CONTENIDO
+    assert len(servidor["peticiones"]) == 1
+
+def test_cache_caducada_se_sirve_y_revalida_en_segundo_plano(servidor, tmp_path):
+    d = DescargadorRemoto(dir_cache=tmp_path, max_edad=0)
+    d.descargar(servidor["url"])
+    r = d.obtener(servidor["url"], plazo=0.1)
+    assert r.origen == "cache" and r.revalidando and r.contenido == CONTENIDO
+    assert d._en_curso[servidor["url"]].result(timeout=5).origen == "revalidado"
+    assert servidor["peticiones"] == [None, ETAG]